@@ -0,0 +1,63 @@
+"""
+Times utils.read_json.parse_inoreader_feed on synthetic Inoreader items and
+reports the parse time per 10k items.
+
+Usage:
+    python -m benchmarks.parse_inoreader_feed [--items 50000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+from utils.read_json import parse_inoreader_feed
+
+TAG_SETS = [
+    ["user/-/label/LeadIT-Steel"],
+    ["user/-/label/LeadIT-Iron"],
+    ["user/-/label/LeadIT-Cement", "user/-/state/com.google/reading-list"],
+]
+
+
+def make_items(count, seed=0):
+    """
+    Builds count items shaped like the stream/contents response.
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        item = {
+            "id": f"tag:google.com,2005:reader/item/{i:016x}",
+            "title": f"Steel plant announcement number {i}",
+            "published": 1700000000 + i,
+            "crawlTimeMsec": str((1700000000 + i) * 1000),
+            "summary": {"content": "<p>" + "Green hydrogen based direct reduction. " * rng.randint(2, 20) + "</p>"},
+            "categories": rng.choice(TAG_SETS),
+        }
+        if rng.random() < 0.8:
+            item["canonical"] = [{"href": f"https://www.google.com/url?q=https://example.com/{i}"}]
+        else:
+            item["alternate"] = [{"href": f"https://example.com/{i}", "type": "text/html"}]
+        items.append(item)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        df = parse_inoreader_feed(items)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"{len(df)} items, best of {args.repeat}: {best:.3f}s ({best / len(df) * 10000 * 1000:.1f} ms per 10k items)")
+    print(f"DataFrame memory: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,10 @@ import streamlit as st
 from services import oauth
 import logging
 from services import inoreader
+from utils.sync_state import SYNC_MODES, DEFAULT_SYNC_MODE
+from utils.question_stats import QUESTION_ORDERS, DEFAULT_QUESTION_ORDER
+from services.query_gpt import SCREENING_MODES, DEFAULT_SCREENING_MODE, DEFAULT_MAX_CONCURRENCY, DEFAULT_ESCALATION_THRESHOLD
+from services.query_gpt import DETAIL_EXTRACTION_MODES, DEFAULT_DETAIL_EXTRACTION_MODE
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -110,20 +114,23 @@ def upload_file(temp_dir):
             st.stop()
     folder_choice = st.selectbox(
         "Select Target Folder", 
-        options=["LeadIT-Iron", "LeadIT-Steel", "LeadIT-Cement"],
+        options=inoreader.LEADIT_FOLDERS,
         key="target_folder_input"
     )
     
     # Display a "Fetch Articles" button.
     if st.button("Fetch Articles", key="fetch_articles_button"):
         st.session_state["target_folder"] = folder_choice
-        # Fetch articles using the chosen folder.
-        articles = inoreader.fetch_inoreader_articles(folder_choice)
+        # Fetch all LeadIT folders at once; the run uses the chosen folder's feed.
+        folder_frames = inoreader.build_dfs_for_folders(inoreader.LEADIT_FOLDERS)
+        st.session_state["folder_frames"] = folder_frames
+        articles = folder_frames[folder_choice].to_dict("records")
         st.session_state["json"] = articles
         st.session_state["selected_json"] = articles
         st.session_state["run_disabled"] = False
         st.session_state["inoreader_authenticated"] = True
         st.success(f"Fetched {len(articles)} articles from folder '{folder_choice}'.")
+        st.caption(", ".join(f"{name}: {len(frame)} articles" for name, frame in folder_frames.items()))
 
 
 
@@ -135,6 +142,81 @@ def upload_file(temp_dir):
 
 
 
+def input_run_options():
+    """
+    Options that change how a run fetches and screens articles. Each widget writes
+    the session_state key main reads.
+    """
+    with st.expander("Run options"):
+        st.selectbox(
+            "Sync mode",
+            options=SYNC_MODES,
+            index=SYNC_MODES.index(DEFAULT_SYNC_MODE),
+            key="sync_mode",
+            help='"incremental" only processes articles that arrived since the last run; '
+                 '"full" refetches and screens the whole past week again.',
+        )
+        st.selectbox(
+            "URLs of irrelevant articles",
+            options=inoreader.IRRELEVANT_URL_MODES,
+            index=inoreader.IRRELEVANT_URL_MODES.index(inoreader.DEFAULT_IRRELEVANT_URL_MODE),
+            key="irrelevant_url_mode",
+            help='"keep" leaves the Inoreader URL; "blocking" resolves it before the results are written; '
+                 '"background" resolves it after the download and then replaces the OneDrive copy.',
+        )
+        st.selectbox(
+            "Screening mode",
+            options=SCREENING_MODES,
+            index=SCREENING_MODES.index(DEFAULT_SCREENING_MODE),
+            key="screening_mode",
+            help='"iterative" asks one question per call and stops at the first "no"; '
+                 '"multi" asks all questions in one call; "batch" packs many headlines into one call; '
+                 '"openai_batch" submits the run to the OpenAI Batch API; '
+                 '"logprob" asks for one-token answers and reads the confidence from their log probabilities.',
+        )
+        st.slider(
+            "Escalation threshold",
+            min_value=0.5,
+            max_value=1.0,
+            value=DEFAULT_ESCALATION_THRESHOLD,
+            step=0.05,
+            key="escalation_threshold",
+            help='Only used by the "logprob" mode: answers less confident than this are asked again '
+                 "with the free-text prompt. 0.5 never escalates.",
+        )
+        st.number_input(
+            "Concurrent GPT requests",
+            min_value=1,
+            max_value=64,
+            value=DEFAULT_MAX_CONCURRENCY,
+            step=1,
+            key="max_concurrency",
+            help="How many screening requests (single headlines or packed batches) are in flight at once.",
+        )
+        st.selectbox(
+            "Question order",
+            options=QUESTION_ORDERS,
+            index=QUESTION_ORDERS.index(DEFAULT_QUESTION_ORDER),
+            key="question_order",
+            help='"adaptive" asks the questions that most often reject a headline first; '
+                 '"fixed" keeps the order of the question list.',
+        )
+        st.selectbox(
+            "Detail extraction mode",
+            options=DETAIL_EXTRACTION_MODES,
+            index=DETAIL_EXTRACTION_MODES.index(DEFAULT_DETAIL_EXTRACTION_MODE),
+            key="detail_extraction_mode",
+            help='"single_pass" extracts all project details in one JSON call per article; '
+                 '"two_round" asks for the core and the additional details separately; '
+                 '"openai_batch" submits the extraction to the OpenAI Batch API.',
+        )
+        if "openai_batch" in (st.session_state.get("screening_mode"), st.session_state.get("detail_extraction_mode")):
+            st.caption(
+                "OpenAI Batch API jobs can take up to a day. A run submits the job and stops; "
+                "run again on the same folder later to collect the answers and write the results."
+            )
+
+
 def input_main_query():
     st.session_state["main_query_input"] = "Extract any quote that addresses “{variable_name}” which we define as “{variable_description}”. "
 
@@ -178,6 +260,7 @@ def build_interface(tmp_dir):
         st.session_state["is_test_run"] = True
     load_text()
     upload_file(tmp_dir)
+    input_run_options()
     # Call input_main_query unconditionally to populate section II.
     input_main_query()
     # If output_format_options isn’t set, initialize it.
@@ -33,16 +33,27 @@ from interface import (
 )
 from tabs.about import about_tab
 from tabs.faq import faq_tab
-from services.query_gpt import new_openai_session, query_gpt_for_relevance, query_gpt_for_relevance_iterative, query_gpt_for_project_details
-from site_text.questions import STEEL_NO, IRON_NO, STEEL_IRON_TECH, CEMENT_NO, CEMENT_TECH
+from services.query_gpt import new_openai_session, query_gpt_for_relevance, screen_headlines, extract_project_details, extract_project_details_many, DEFAULT_MAX_CONCURRENCY, DEFAULT_SCREENING_MODE, DEFAULT_DETAIL_EXTRACTION_MODE, DEFAULT_ESCALATION_THRESHOLD
+from site_text.questions import STEEL_NO, IRON_NO, STEEL_IRON_TECH, CEMENT_NO, CEMENT_TECH, DETAIL_FIELD_SPECS
 from utils.read_json import parse_json_feed
-from services.inoreader import build_df_for_folder, fetch_full_article_text
+from services.inoreader import build_df_for_folder, drop_processed, fetch_full_article_texts
 from utils.relevant_excerpts import (
+    build_detail_context,
     find_top_relevant_texts
 )
 from services.onedrive import upload_file_to_onedrive
-from utils.results import get_output_fname, output_results_excel  
-from services.inoreader import resolve_with_playwright
+from services.openai_limiter import default_limiter_stats
+from services.openai_batch import BatchPending
+from utils.results import get_output_fname, output_results_excel, ONEDRIVE_SECRET_KEYS
+from utils.verdict_cache import VerdictCache, DEFAULT_VERDICT_CACHE_PATH
+from utils.url_cache import UrlCache, DEFAULT_URL_CACHE_PATH
+from utils.article_cache import ArticleCache, DEFAULT_ARTICLE_CACHE_PATH
+from utils.embedding_cache import EmbeddingCache, DEFAULT_EMBEDDING_CACHE_DIR
+from utils.prefilter import prefilter_for_folder
+from utils.dedup import DEFAULT_DEDUP_THRESHOLD
+from utils.question_stats import QuestionStats, DEFAULT_QUESTION_STATS_PATH, DEFAULT_QUESTION_ORDER
+from utils.sync_state import SyncState, DEFAULT_SYNC_STATE_PATH, DEFAULT_SYNC_MODE
+from services.inoreader import resolve_urls, resolve_urls_in_background, DEFAULT_RESOLVE_WORKERS, DEFAULT_IRRELEVANT_URL_MODE
 from tempfile import TemporaryDirectory
 import json
 import os
@@ -172,6 +183,7 @@ def main(gpt_analyzer, openai_apikey):
     """
 
     total_start_time = time.time()
+    sync_state = None
     if st.session_state["active_tab"] == "JSON File":
         json_path = get_resource_path(gpt_analyzer.json[0])
         try:
@@ -182,13 +194,33 @@ def main(gpt_analyzer, openai_apikey):
             return 0
     else:
         try:
-            headlines = build_df_for_folder(st.session_state["target_folder"])
+            # Incremental sync: only fetch items past the folder's watermark and skip
+            # items that already have a verdict. sync_mode "full" refetches the whole week.
+            sync_state = SyncState(get_resource_path(DEFAULT_SYNC_STATE_PATH))
+            full_resync = st.session_state.get("sync_mode", DEFAULT_SYNC_MODE) == "full"
+            # "Fetch Articles" already fetched every folder's week; each fetch feeds one run.
+            headlines = st.session_state.get("folder_frames", {}).pop(st.session_state["target_folder"], None)
+            if headlines is None:
+                headlines = build_df_for_folder(
+                    st.session_state["target_folder"],
+                    sync_state=sync_state,
+                    full_resync=full_resync
+                )
+            elif not full_resync:
+                headlines = drop_processed(headlines, st.session_state["target_folder"], sync_state)
             json_path = "Inoreader"
             print(headlines)
             print(f"Parsed {len(headlines)} headlines from JSON.")
         except Exception as e:
             print(f"Failed to parse JSON: {e}")
+            if sync_state is not None:
+                sync_state.close()
             return 0
+    if headlines.empty:
+        print("No new headlines since the last run.")
+        if sync_state is not None:
+            sync_state.close()
+        return 0
     openai_client, gpt_model, _ = new_openai_session(openai_apikey)
     
     # Convert headlines into a DataFrame with necessary text column
@@ -203,35 +235,134 @@ def main(gpt_analyzer, openai_apikey):
         target_questions = CEMENT_NO
     else:
         target_questions = []  # or some default
+    # Reuse screening verdicts from earlier runs over the same headlines.
+    verdict_cache = VerdictCache(get_resource_path(DEFAULT_VERDICT_CACHE_PATH))
+    question_stats = QuestionStats(folder, get_resource_path(DEFAULT_QUESTION_STATS_PATH))
     # Assuming your DataFrame of articles is in `headlines` and you have run_on_full_text defined
-    relevance_df = query_gpt_for_relevance_iterative(
-        gpt_analyzer,
-        headlines,
-        target_questions,
-        run_on_full_text=True,  # or False, as applicable
-        gpt_client=openai_client,
-        gpt_model=gpt_model
-    )
+    try:
+        relevance_df = screen_headlines(
+            gpt_analyzer,
+            headlines,
+            target_questions,
+            run_on_full_text=True,  # or False, as applicable
+            gpt_client=openai_client,
+            gpt_model=gpt_model,
+            mode=st.session_state.get("screening_mode", DEFAULT_SCREENING_MODE),
+            max_concurrency=st.session_state.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            verdict_cache=verdict_cache,
+            # Obvious rejects (conferences, dividends, tariffs, ...) are dropped locally before GPT.
+            # Off by default until its audit log shows it does not drop relevant articles.
+            prefilter=prefilter_for_folder(folder) if st.session_state.get("use_prefilter", False) else None,
+            # Syndicated copies of one story are screened once; set dedup_threshold to None to screen every copy.
+            dedup_threshold=st.session_state.get("dedup_threshold", DEFAULT_DEDUP_THRESHOLD),
+            # Ask the questions that usually reject first; question_order "fixed" keeps the list order.
+            question_stats=question_stats,
+            question_order=st.session_state.get("question_order", DEFAULT_QUESTION_ORDER),
+            # Only used by the "logprob" screening mode; None disables the second opinion.
+            escalation_threshold=st.session_state.get("escalation_threshold", DEFAULT_ESCALATION_THRESHOLD),
+            # Only used by the "openai_batch" screening mode; one pending job per folder.
+            batch_name=f"screening-{folder}"
+        )
+    except BatchPending as e:
+        # Batch runs do not wait: the job was submitted (or is still running) and a later run collects it.
+        print(e)
+        st.info(str(e))
+        if sync_state is not None:
+            sync_state.close()
+        return 0
+    finally:
+        verdict_cache.close()
+        question_stats.close()
     # Process relevant results for output
-    # After obtaining relevance_df from query_gpt_for_relevance_iterative:
+    # After obtaining relevance_df from screen_headlines:
     relevant_articles = []
     irrelevant_articles = []
 
+    # Resolve article URLs up front: plain HTTP first, one shared browser for the rest.
+    # Unless irrelevant_url_mode is "blocking", only relevant articles wait for resolution;
+    # irrelevant ones keep their Inoreader URL.
+    irrelevant_url_mode = st.session_state.get("irrelevant_url_mode", DEFAULT_IRRELEVANT_URL_MODE)
+    source_urls = [
+        headlines.loc[row["index"]]["url"]
+        for _, row in relevance_df.iterrows()
+        if row["relevant"] != "no" or irrelevant_url_mode == "blocking"
+    ]
+    url_cache = UrlCache(get_resource_path(DEFAULT_URL_CACHE_PATH))
+    resolved_urls = dict(zip(
+        source_urls,
+        resolve_urls(
+            source_urls,
+            max_workers=st.session_state.get("resolve_workers", DEFAULT_RESOLVE_WORKERS),
+            url_cache=url_cache
+        )
+    ))
+    url_cache.close()
+
+    # Download and parse all relevant articles at once.
+    relevant_indexes = [row["index"] for _, row in relevance_df.iterrows() if row["relevant"] != "no"]
+    # Failed (or negatively cached) resolutions come back as None; keep the Inoreader URL then.
+    relevant_urls = [
+        resolved_urls.get(headlines.loc[index]["url"]) or headlines.loc[index]["url"] for index in relevant_indexes
+    ]
+    article_cache = ArticleCache(get_resource_path(DEFAULT_ARTICLE_CACHE_PATH))
+    full_texts = dict(zip(
+        relevant_indexes,
+        fetch_full_article_texts([{"url": url} for url in relevant_urls], article_cache=article_cache)
+    ))
+    article_cache.close()
+    embedding_cache = EmbeddingCache(get_resource_path(DEFAULT_EMBEDDING_CACHE_DIR))
+    detail_mode = st.session_state.get("detail_extraction_mode", DEFAULT_DETAIL_EXTRACTION_MODE)
+    tech_list = CEMENT_TECH if st.session_state["target_folder"] == "LeadIT-Cement" else STEEL_IRON_TECH
+    batched_details = None
+    if detail_mode == "openai_batch":
+        # All relevant articles go into one Batch API job; the loop below reads its results.
+        # The screening verdicts are cached, so the run that collects the job screens nothing again.
+        try:
+            batched_details = extract_project_details_many(
+                openai_client,
+                gpt_model,
+                {
+                    index: build_detail_context(openai_client, full_texts.get(index, ""), DETAIL_FIELD_SPECS, embedding_cache=embedding_cache)
+                    for index in relevant_indexes
+                },
+                tech_list,
+                mode=detail_mode,
+                batch_name=f"details-{folder}"
+            )
+        except BatchPending as e:
+            print(e)
+            st.info(str(e))
+            embedding_cache.close()
+            if sync_state is not None:
+                sync_state.close()
+            return 0
+
     for _, row in relevance_df.iterrows():
         article_index = row["index"]
         article_row = headlines.loc[article_index]
         article_row["title"] = article_row["title"].split(" - ")[0].strip()
         title = article_row["title"] 
-        article_row["url"] = resolve_with_playwright(article_row["url"])
+        article_row["url"] = resolved_urls.get(article_row["url"]) or article_row["url"]
         url = article_row["url"]
+        # Near-duplicate cluster membership, recorded in the output for audit.
+        cluster_info = {}
+        if "cluster_id" in relevance_df.columns:
+            cluster_info = {
+                "cluster_id": row["cluster_id"],
+                "duplicate_of": "" if row["representative"] else headlines.loc[row["cluster_id"]]["title"]
+            }
         if row["relevant"] != "no":
-            # Fetch full article text (or use text from the article if already available)
-            full_text = fetch_full_article_text(article_row)
-            if st.session_state["target_folder"] == "LeadIT-Cement":
-            # Extract project details from the article text using the new GPT function.
-                details = query_gpt_for_project_details(openai_client, gpt_model, full_text, CEMENT_TECH)
+            # Full article text was fetched above, before the loop
+            full_text = full_texts.get(article_index, "")
+            if batched_details is not None:
+                details = batched_details[article_index]
             else:
-                details = query_gpt_for_project_details(openai_client, gpt_model, full_text, STEEL_IRON_TECH)  
+                # Long articles are reduced to the excerpts most relevant to the extracted fields.
+                detail_context = build_detail_context(
+                    openai_client, full_text, DETAIL_FIELD_SPECS, embedding_cache=embedding_cache
+                )
+                # Extract project details from the article text using the new GPT function.
+                details = extract_project_details(openai_client, gpt_model, detail_context, tech_list, mode=detail_mode)
             print("done w/ details")
             if details:
                 # Merge the details into the article dictionary.
@@ -239,21 +370,28 @@ def main(gpt_analyzer, openai_apikey):
                     "title": title,
                     "url": url,
                     "full_text": full_text,
-                    **details
+                    **details,
+                    **cluster_info
                 }
                 relevant_articles.append(article_info)
             else:
                 article_info = {
                     "title": title,
-                    "url": url
+                    "url": url,
+                    **cluster_info
                 }
                 relevant_articles.append(article_info)
         else:
             irrelevant_articles.append({
                 "title": title,
-                "url": url
+                "url": url,
+                **cluster_info
             })
 
+    logger.info("Embedding cache: %s", embedding_cache.stats())
+    logger.info("OpenAI rate limiters: %s", default_limiter_stats())
+    embedding_cache.close()
+
     logger.info("Total relevant articles: %s", len(relevant_articles))
     logger.info("Total irrelevant articles: %s", len(irrelevant_articles))
 
@@ -261,12 +399,37 @@ def main(gpt_analyzer, openai_apikey):
     output_fname = get_output_fname(get_resource_path, filetype="xlsx")
     logger.info("Saving Excel file to %s", output_fname)
 
-    # Use the new Excel output function
-    output_results_excel(relevant_articles, irrelevant_articles, output_fname)
+    # output_results_excel extends irrelevant_articles in place, so keep the screened list for a rewrite.
+    screened_irrelevant_articles = list(irrelevant_articles)
+    # Use the new Excel output function; it returns the OneDrive response, or None if the upload failed.
+    uploaded = output_results_excel(relevant_articles, irrelevant_articles, output_fname)
 
     # Optionally, display or notify the user that the file has been created
     display_output(output_fname)
 
+    if irrelevant_url_mode == "background" and screened_irrelevant_articles:
+        # The workbook is written; resolve the irrelevant URLs at low priority and write it again.
+        # The thread runs outside the script run, so it gets the OneDrive secrets up front.
+        onedrive_secrets = {key: st.secrets[key] for key in ONEDRIVE_SECRET_KEYS}
+
+        def rewrite_with_resolved_urls(resolved):
+            updated_irrelevant = [
+                {**article, "url": resolved.get(article["url"]) or article["url"]}
+                for article in screened_irrelevant_articles
+            ]
+            output_results_excel(relevant_articles, updated_irrelevant, output_fname, onedrive_secrets)
+
+        st.info(
+            "The URLs of irrelevant articles are still being resolved. The OneDrive copy of the results "
+            "will be replaced once they are, so it will differ from the file downloaded here."
+        )
+
+        resolve_urls_in_background(
+            [article["url"] for article in screened_irrelevant_articles],
+            get_resource_path(DEFAULT_URL_CACHE_PATH),
+            on_done=rewrite_with_resolved_urls
+        )
+
     
     # Create a container for output messages.
 
@@ -274,6 +437,20 @@ def main(gpt_analyzer, openai_apikey):
 
     
 
+    if sync_state is not None and not uploaded:
+        # Leave the items unprocessed so the next run produces the workbook again.
+        print("OneDrive upload failed; not recording this run in the sync state.")
+        st.warning("The results could not be uploaded to OneDrive. The next run will process these articles again.")
+        sync_state.close()
+    elif sync_state is not None:
+        # Only a finished, uploaded run moves the watermark, so a crash is retried in full next time.
+        sync_state.record_run(
+            folder,
+            {headlines.loc[row["index"]]["id"]: row["relevant"] for _, row in relevance_df.iterrows()},
+            watermark=headlines["crawl_time"].max()
+        )
+        sync_state.close()
+
     print_milestone("Done processing headlines", total_start_time, {"Number of articles": len(relevant_articles)})
     return len(relevant_articles)
 
@@ -1,7 +1,12 @@
 import streamlit as st
+import pandas as pd
+import random
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import urllib.parse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from utils.read_json import parse_inoreader_feed
 from newspaper import Article
 import re
@@ -11,70 +16,207 @@ import logging
 import asyncio
 import os
 import subprocess
+import threading
+from utils.url_cache import UrlCache
+from utils.article_cache import ArticleCache
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def fetch_inoreader_articles(folder_name):
+# Incremental syncs start this long before the watermark; the processed-ID set drops the overlap.
+SYNC_OVERLAP_SECONDS = 60 * 60
+
+INOREADER_API_URL = "https://www.inoreader.com/reader/api/0"
+LEADIT_FOLDERS = ["LeadIT-Iron", "LeadIT-Steel", "LeadIT-Cement"]
+INOREADER_PAGE_SIZE = 100
+INOREADER_TIMEOUT = 30
+INOREADER_MAX_RETRIES = 5
+INOREADER_BACKOFF_SECONDS = 2
+INOREADER_MAX_BACKOFF_SECONDS = 120
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class InoreaderClient:
     """
-    Fetch all articles from a given folder (label) that were published in the past week.
-    This function uses pagination (via the continuation token) and query parameters:
-      - n: max number of items per request (100)
-      - r: order ("o" for oldest first so that we can use the ot parameter)
-      - ot: start time (Unix timestamp) from which to return items
+    Inoreader API client with a keep-alive connection pool. Requests that hit the
+    rate limit (429) or a transient server error are retried with backoff; the wait
+    comes from Retry-After / X-Reader-Limits-Reset-After when the server sends them.
+    A request that still fails raises instead of returning a partial feed.
     """
-    access_token = st.session_state["access_token"]
-    if not access_token:
-        return []
 
+    def __init__(self, access_token, pool_size=len(LEADIT_FOLDERS), max_retries=INOREADER_MAX_RETRIES,
+                 backoff_seconds=INOREADER_BACKOFF_SECONDS, timeout=INOREADER_TIMEOUT):
+        self.access_token = access_token
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {access_token}"})
+        # Latest X-Reader-Zone1-Usage / X-Reader-Zone1-Limit seen, for logging.
+        self.zone1_usage = None
+        self.zone1_limit = None
 
-    
-    # Compute the Unix timestamp for one week ago.
-    one_week_ago = int(time.time()) - 7 * 24 * 60 * 60
-    
-    articles = []
-    n = 100
-    continuation = None
-    
-    # Build the stream URL.
-    stream_id = urllib.parse.quote(f"user/-/label/{folder_name}", safe='')
-    base_url = f"https://www.inoreader.com/reader/api/0/stream/contents/{stream_id}"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    
-    # Loop until no continuation token is returned.
-    while True:
-        # Set parameters: using r="o" (oldest first) and ot with the start time.
-        params = {
-            "n": n,
-            "r": "o",
-            "ot": one_week_ago,
-            "output": "json"  # explicitly request JSON, though this endpoint returns JSON by default.
-        }
-        if continuation:
-            params["c"] = continuation
-        
-        response = requests.get(base_url, headers=headers, params=params)
-        if response.status_code == 200:
-            json_data = response.json()
+    def get(self, path, params=None):
+        """
+        GETs INOREADER_API_URL + path and returns the decoded JSON, retrying on 429/5xx and connection errors.
+        """
+        url = f"{INOREADER_API_URL}/{path}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                wait = self.backoff_delay(attempt)
+                logger.warning("Inoreader request failed (%s); retrying in %.1fs", e, wait)
+                time.sleep(wait)
+                continue
+
+            self.record_usage(response)
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                wait = self.backoff_delay(attempt, response)
+                logger.warning(
+                    "Inoreader returned %s (zone 1 usage %s/%s); retrying in %.1fs",
+                    response.status_code, self.zone1_usage, self.zone1_limit, wait
+                )
+                time.sleep(wait)
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def backoff_delay(self, attempt, response=None):
+        """
+        Returns the seconds to wait before retry number attempt + 1.
+        """
+        if response is not None:
+            for header in ("Retry-After", "X-Reader-Limits-Reset-After"):
+                try:
+                    return min(float(response.headers[header]), INOREADER_MAX_BACKOFF_SECONDS)
+                except (KeyError, ValueError):
+                    continue
+        delay = self.backoff_seconds * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), INOREADER_MAX_BACKOFF_SECONDS)
+
+    def record_usage(self, response):
+        try:
+            self.zone1_usage = int(response.headers["X-Reader-Zone1-Usage"])
+            self.zone1_limit = int(response.headers["X-Reader-Zone1-Limit"])
+        except (KeyError, ValueError):
+            return
+        if self.zone1_limit and self.zone1_usage >= 0.9 * self.zone1_limit:
+            logger.warning("Inoreader zone 1 usage at %s/%s requests", self.zone1_usage, self.zone1_limit)
+
+    def iter_pages(self, folder_name, since=None, page_size=INOREADER_PAGE_SIZE):
+        """
+        Yields the items of a folder one page at a time, oldest first, following continuation tokens.
+        Only items from the past week are returned, or from since (Unix timestamp) if that is later.
+        """
+        one_week_ago = int(time.time()) - 7 * 24 * 60 * 60
+        start_time = max(one_week_ago, int(since)) if since else one_week_ago
+        stream_id = urllib.parse.quote(f"user/-/label/{folder_name}", safe='')
+        continuation = None
+        while True:
+            params = {"n": page_size, "r": "o", "ot": start_time, "output": "json"}
+            if continuation:
+                params["c"] = continuation
+            json_data = self.get(f"stream/contents/{stream_id}", params)
             items = json_data.get("items", [])
             if not items:
                 break
-            articles.extend(items)
-            
+            yield items
             continuation = json_data.get("continuation")
             if not continuation:
                 break
-        else:
-            break
-            
+
+    def close(self):
+        self.session.close()
+
+
+def get_inoreader_client():
+    """
+    Returns the current session's InoreaderClient, or None when not authenticated.
+    The client lives in st.session_state, so it is freed with the session and
+    never shared between users; a new access token replaces it.
+    """
+    access_token = st.session_state.get("access_token")
+    if not access_token:
+        return None
+    client = st.session_state.get("inoreader_client")
+    if client is None or client.access_token != access_token:
+        if client is not None:
+            client.close()
+        client = InoreaderClient(access_token)
+        st.session_state["inoreader_client"] = client
+    return client
+
+def fetch_inoreader_articles(folder_name, since=None, client=None):
+    """
+    Fetch all articles from a given folder (label) that were published in the past week.
+    This function uses pagination (via the continuation token) and query parameters:
+      - n: max number of items per request (100)
+      - r: order ("o" for oldest first so that we can use the ot parameter)
+      - ot: start time (Unix timestamp) from which to return items
+    If since (Unix timestamp) is given and falls inside the past week, only items after it are fetched.
+    """
+    client = client or get_inoreader_client()
+    if client is None:
+        return []
+    articles = []
+    for items in client.iter_pages(folder_name, since):
+        articles.extend(items)
     return articles
 
 
 
-def build_df_for_folder(folder_name):
-    response = fetch_inoreader_articles(folder_name)
-    df = parse_inoreader_feed(response)
+def build_df_for_folder(folder_name, sync_state=None, full_resync=False, client=None):
+    """
+    Fetches and parses a folder, parsing each page as soon as it arrives. With a
+    sync_state and full_resync False, only items newer than the folder's watermark
+    are fetched, and items that already have a final verdict are dropped.
+    """
+    client = client or get_inoreader_client()
+    if client is None:
+        return pd.DataFrame()
+    since = None
+    if sync_state is not None and not full_resync:
+        watermark = sync_state.get_watermark(folder_name)
+        if watermark:
+            since = watermark - SYNC_OVERLAP_SECONDS
+    frames = [parse_inoreader_feed(items) for items in client.iter_pages(folder_name, since)]
+    frames = [frame for frame in frames if not frame.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if len(frames) > 1:
+        # Pages carry different tag categories, so concat falls back to object dtype.
+        df["tags"] = df["tags"].astype("category")
+    if sync_state is not None and not full_resync:
+        df = drop_processed(df, folder_name, sync_state)
     return(df)
 
+def drop_processed(df, folder_name, sync_state):
+    """
+    Drops the items of folder_name that already have a final verdict in sync_state.
+    """
+    if df.empty:
+        return df
+    fetched = len(df)
+    processed = sync_state.processed_ids(folder_name)
+    df = df[~df["id"].astype(str).isin(processed)]
+    logger.info("Incremental sync: %s new items in %s (%s fetched)", len(df), folder_name, fetched)
+    return df
+
+def build_dfs_for_folders(folder_names=LEADIT_FOLDERS, sync_state=None, full_resync=False, client=None):
+    """
+    Fetches several folders concurrently over one connection pool. Returns {folder_name: DataFrame}.
+    """
+    client = client or get_inoreader_client()
+    with ThreadPoolExecutor(max_workers=max(1, len(folder_names))) as executor:
+        futures = {
+            folder_name: executor.submit(build_df_for_folder, folder_name, sync_state, full_resync, client)
+            for folder_name in folder_names
+        }
+        return {folder_name: future.result() for folder_name, future in futures.items()}
+
 async def ensure_playwright_browsers():
     # Define the expected path to the Chromium executable.
     chrome_path = os.path.expanduser("~/.cache/ms-playwright/chromium-1112/chrome-linux/chrome")
@@ -91,48 +233,312 @@ async def ensure_playwright_browsers():
             logger.error("Error installing browsers via playwright install: %s", e)
             raise
 
-async def resolve_with_playwright_async(url):
-    logger.info("Starting resolve_with_playwright_async for URL: %s", url)
+# Number of browser pages resolving URLs at the same time.
+DEFAULT_RESOLVE_WORKERS = 4
+
+async def block_resource(route, request):
+    if request.resource_type in ["image", "stylesheet", "font"]:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def resolve_on_page(page, url):
+    """
+    Navigates an already open page to url and returns the URL it settles on,
+    or None if the navigation never got past the blank page.
+    Pages are reused across URLs, so the page is reset to about:blank first;
+    otherwise a failed navigation would report the previous article's URL.
+    """
+    try:
+        await page.goto("about:blank")
+        logger.info("Navigating to URL: %s", url)
+        await page.goto(url, wait_until="networkidle", timeout=15000)
+        await page.wait_for_timeout(1000)
+        logger.info("Navigation complete. Current page URL: %s", page.url)
+    except Exception as e:
+        logger.error("Error during page.goto: %s", e)
+    if page.url in ("", "about:blank"):
+        return None
+    return page.url
+
+async def resolve_urls_with_playwright_async(urls, max_workers=DEFAULT_RESOLVE_WORKERS):
+    """
+    Resolves many URLs with a single headless Chromium.
+    The browser is launched once; max_workers pages in one shared context pull
+    URLs from a queue, so startup is paid once per call instead of once per URL.
+
+    Returns:
+        list: The final URL for each input URL, in input order.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+    logger.info("Resolving %s URLs with %s browser pages", len(unique_urls), max_workers)
     # Ensure the required browsers are installed before launching.
     await ensure_playwright_browsers()
-    
+
+    queue = asyncio.Queue()
+    for url in unique_urls:
+        queue.put_nowait(url)
+    resolved = {}
+
     async with async_playwright() as p:
         logger.info("Creating browser")
         browser = await p.chromium.launch(headless=True, args=["--no-sandbox", "--disable-setuid-sandbox"])
-        logger.info("Creating page")
-        page = await browser.new_page()
+        try:
+            context = await browser.new_context()
+            await context.route("**/*", block_resource)
 
-        async def block_resource(route, request):
-            if request.resource_type in ["image", "stylesheet", "font"]:
-                await route.abort()
-            else:
-                await route.continue_()
-        await page.route("**/*", block_resource)
+            async def worker():
+                page = await context.new_page()
+                try:
+                    while True:
+                        try:
+                            url = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        resolved[url] = await resolve_on_page(page, url)
+                finally:
+                    await page.close()
 
-        try:
-            logger.info("Navigating to URL: %s", url)
-            await page.goto(url, wait_until="networkidle", timeout=15000)
-            await page.wait_for_timeout(1000)
-            logger.info("Navigation complete. Current page URL: %s", page.url)
-        except Exception as e:
-            logger.error("Error during page.goto: %s", e)
-        final_url = page.url
-        await browser.close()
-        return final_url
+            num_workers = max(1, min(int(max_workers), len(unique_urls)))
+            await asyncio.gather(*[worker() for _ in range(num_workers)])
+        finally:
+            await browser.close()
+    return [resolved.get(url) for url in urls]
 
-def resolve_with_playwright(url):
+async def resolve_with_playwright_async(url):
+    logger.info("Starting resolve_with_playwright_async for URL: %s", url)
+    resolved = await resolve_urls_with_playwright_async([url], max_workers=1)
+    return resolved[0]
+
+def run_playwright_coroutine(coro):
     """
-    Synchronously run the async resolve_with_playwright_async function.
+    Synchronously run an async Playwright coroutine.
     Uses WindowsProactorEventLoopPolicy on Windows if needed.
     """
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    return asyncio.run(coro)
+
+def resolve_with_playwright(url, url_cache=None):
+    """
+    Synchronously run the async resolve_with_playwright_async function.
+    When url_cache is given, a cached resolution is returned without starting
+    a browser, and new results (including failures) are stored in it.
+    """
+    if url_cache is not None:
+        found, cached_url = url_cache.lookup(url)
+        if found:
+            return cached_url
     try:
-        if os.name == 'nt':
-            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        result = asyncio.run(resolve_with_playwright_async(url))
-        return result
+        final_url = run_playwright_coroutine(resolve_with_playwright_async(url))
     except Exception as e:
         logger.error("Error running async Playwright: %s", e)
-        return None
+        final_url = None
+    if url_cache is not None:
+        url_cache.store(url, final_url if is_resolved(final_url) else None)
+    return final_url
+
+def resolve_urls_with_playwright(urls, max_workers=DEFAULT_RESOLVE_WORKERS):
+    """
+    Synchronously resolve a list of URLs with one shared browser.
+    Returns None for every URL if the browser could not be started.
+    """
+    urls = list(urls)
+    try:
+        return run_playwright_coroutine(resolve_urls_with_playwright_async(urls, max_workers))
+    except Exception as e:
+        logger.error("Error running async Playwright: %s", e)
+        return [None] * len(urls)
+
+# How URLs of articles screened as irrelevant are handled:
+#   keep       - leave the Inoreader canonical URL as is
+#   background - keep it for the first workbook, then resolve it in a background pass and replace
+#                the OneDrive copy, which then differs from the workbook already downloaded
+#   blocking   - resolve it before writing the workbook, like relevant articles
+IRRELEVANT_URL_MODES = ["keep", "background", "blocking"]
+DEFAULT_IRRELEVANT_URL_MODE = "keep"
+
+# Number of threads chasing HTTP redirects at the same time.
+DEFAULT_HTTP_RESOLVE_WORKERS = 16
+HTTP_RESOLVE_TIMEOUT = 10
+# Only this much of a page is read when looking for a canonical or meta-refresh tag.
+HTML_SNIFF_BYTES = 256 * 1024
+HTTP_RESOLVE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+}
+# Hosts that only redirect to the article. A URL still on one of these is not resolved yet.
+REDIRECT_SHIM_HOSTS = ["inoreader.com", "news.google.com", "feedproxy.google.com", "google.com"]
+
+# How often each resolution tier produced the final URL:
+#   http_redirect  - following HTTP redirects was enough
+#   html_canonical - a canonical link or meta refresh in the HTML pointed to the article
+#   cache          - the URL was resolved (or failed) on a recent run
+#   playwright     - a headless browser was needed
+#   unresolved     - no tier produced a URL
+RESOLUTION_STATS = Counter()
+
+LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+ATTR_RE = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+REFRESH_URL_RE = re.compile(r"url\s*=\s*['\"]?([^'\";]+)", re.IGNORECASE)
+
+def new_http_session(pool_size=DEFAULT_HTTP_RESOLVE_WORKERS):
+    """
+    Returns a requests.Session with a keep-alive connection pool large enough for pool_size threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HTTP_RESOLVE_HEADERS)
+    return session
+
+def is_redirect_shim(url):
+    host = urllib.parse.urlparse(url or "").netloc.lower().split(":")[0]
+    return any(host == shim or host.endswith("." + shim) for shim in REDIRECT_SHIM_HOSTS)
+
+def is_resolved(url):
+    """
+    True if url looks like a final article URL rather than a failure or a redirect page.
+    """
+    return bool(url) and url.startswith("http") and not is_redirect_shim(url)
+
+def tag_attributes(tag):
+    return {
+        name.lower(): next(value for value in values if value is not None)
+        for name, *values in ATTR_RE.findall(tag)
+    }
+
+def find_html_redirect(html, base_url):
+    """
+    Looks for a meta refresh or <link rel="canonical"> target in an HTML page.
+    Returns the absolute target URL, or None if the page has neither.
+    """
+    for tag in META_TAG_RE.findall(html):
+        attrs = tag_attributes(tag)
+        if attrs.get("http-equiv", "").lower() == "refresh":
+            match = REFRESH_URL_RE.search(attrs.get("content", ""))
+            if match:
+                return urllib.parse.urljoin(base_url, match.group(1).strip())
+    for tag in LINK_TAG_RE.findall(html):
+        attrs = tag_attributes(tag)
+        if "canonical" in attrs.get("rel", "").lower().split() and attrs.get("href"):
+            return urllib.parse.urljoin(base_url, attrs["href"].strip())
+    return None
+
+def resolve_with_http(url, session, timeout=HTTP_RESOLVE_TIMEOUT):
+    """
+    Tries to resolve url without a browser: a HEAD request following redirects,
+    then a GET whose first HTML_SNIFF_BYTES are searched for a canonical link or meta refresh.
+
+    Returns:
+        tuple: (final_url, tier) on success, (None, None) if the URL needs JavaScript.
+    """
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout)
+        if response.status_code < 400 and not is_redirect_shim(response.url):
+            return response.url, "http_redirect"
+    except requests.RequestException as e:
+        logger.info("HEAD failed for %s: %s", url, e)
+    try:
+        with session.get(url, allow_redirects=True, timeout=timeout, stream=True) as response:
+            if response.status_code >= 400:
+                return None, None
+            if not is_redirect_shim(response.url):
+                return response.url, "http_redirect"
+            content = response.raw.read(HTML_SNIFF_BYTES, decode_content=True)
+            html = content.decode(response.encoding or "utf-8", errors="replace")
+            target = find_html_redirect(html, response.url)
+            if target and not is_redirect_shim(target):
+                return target, "html_canonical"
+    except requests.RequestException as e:
+        logger.info("GET failed for %s: %s", url, e)
+    return None, None
+
+def resolve_urls(urls, max_workers=DEFAULT_RESOLVE_WORKERS, http_workers=DEFAULT_HTTP_RESOLVE_WORKERS, url_cache=None):
+    """
+    Resolves article URLs, trying url_cache first, then the cheap HTTP tier,
+    and starting Playwright only for the URLs neither could resolve.
+    Every fresh result is written back to url_cache; failures are cached as
+    None with a short TTL, so a dead link is not retried on every run.
+    Per-tier counts are added to RESOLUTION_STATS.
+
+    Returns:
+        list: The final URL (or None) for each input URL, in input order.
+    """
+    urls = list(urls)
+    unique_urls = [url for url in dict.fromkeys(urls) if url]
+    resolved = {}
+    if url_cache is not None:
+        for url in unique_urls:
+            found, cached_url = url_cache.lookup(url)
+            if found:
+                resolved[url] = cached_url
+                RESOLUTION_STATS["cache"] += 1
+
+    needs_http = [url for url in unique_urls if url not in resolved]
+    if needs_http:
+        with new_http_session(http_workers) as session, ThreadPoolExecutor(max_workers=http_workers) as executor:
+            http_results = executor.map(lambda url: resolve_with_http(url, session), needs_http)
+            for url, (final_url, tier) in zip(needs_http, http_results):
+                if final_url:
+                    resolved[url] = final_url
+                    RESOLUTION_STATS[tier] += 1
+                    if url_cache is not None:
+                        url_cache.store(url, final_url)
+
+    needs_browser = [url for url in needs_http if url not in resolved]
+    if needs_browser:
+        logger.info("%s of %s URLs need a browser", len(needs_browser), len(unique_urls))
+        for url, final_url in zip(needs_browser, resolve_urls_with_playwright(needs_browser, max_workers)):
+            resolved[url] = final_url
+            RESOLUTION_STATS["playwright" if is_resolved(final_url) else "unresolved"] += 1
+            if url_cache is not None:
+                url_cache.store(url, final_url if is_resolved(final_url) else None)
+    log_resolution_stats()
+    if url_cache is not None:
+        logger.info("URL cache: %s", url_cache.stats())
+    return [resolved.get(url) for url in urls]
+
+def resolve_urls_in_background(urls, url_cache_path, on_done=None, max_workers=1, http_workers=4):
+    """
+    Resolves urls in a low-priority daemon thread, storing results in the URL
+    cache at url_cache_path. Uses few workers to leave the network and CPU to
+    the foreground work. When resolution finishes, on_done is called with a
+    dict mapping each source URL to its resolved URL (or None).
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    urls = list(urls)
+
+    def run():
+        url_cache = UrlCache(url_cache_path)
+        try:
+            resolved = resolve_urls(urls, max_workers=max_workers, http_workers=http_workers, url_cache=url_cache)
+            if on_done is not None:
+                on_done(dict(zip(urls, resolved)))
+        except Exception as e:
+            logger.error("Background URL resolution failed: %s", e)
+        finally:
+            url_cache.close()
+
+    thread = threading.Thread(target=run, name="background-url-resolution", daemon=True)
+    thread.start()
+    logger.info("Resolving %s URLs in the background", len(urls))
+    return thread
+
+def log_resolution_stats():
+    total = sum(RESOLUTION_STATS.values())
+    if not total:
+        return
+    rates = ", ".join(
+        f"{tier}: {count} ({count / total:.0%})" for tier, count in RESOLUTION_STATS.most_common()
+    )
+    logger.info("URL resolution tiers - %s", rates)
 
 def fetch_full_article_text(row):
     real_url = row.get("url")
@@ -149,4 +555,120 @@ def fetch_full_article_text(row):
         return article.text
     except Exception as e:
         print(f"Error fetching article from {real_url}: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+# Number of threads downloading article pages at the same time.
+DEFAULT_DOWNLOAD_WORKERS = 8
+# Number of processes running newspaper's parser.
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+ARTICLE_DOWNLOAD_TIMEOUT = 15
+
+def download_article_html(url, session, timeout=ARTICLE_DOWNLOAD_TIMEOUT, headers=None):
+    """
+    Downloads an article page over the pooled session.
+    headers may carry If-None-Match / If-Modified-Since validators.
+
+    Returns:
+        tuple: (status_code, html, etag, last_modified). status_code is 304 when
+        the cached copy is still valid and 0 on failure; html is "" unless the page was downloaded.
+        html is bytes when the response declares no charset.
+    """
+    try:
+        response = session.get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304:
+            return 304, "", None, None
+        response.raise_for_status()
+        if "charset" in (response.headers.get("Content-Type") or "").lower():
+            html = response.text
+        else:
+            # requests would decode as ISO-8859-1; like newspaper's own downloader, hand over
+            # the bytes so newspaper detects the encoding from the page's meta tags.
+            html = response.content
+        return response.status_code, html, response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except requests.RequestException as e:
+        print(f"Error downloading article from {url}: {e}")
+        return 0, "", None, None
+
+def parse_article_html(url, html):
+    """
+    Runs newspaper's extraction on already downloaded HTML. Module-level so it can run in a process pool.
+    """
+    try:
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+        return article.text
+    except Exception as e:
+        print(f"Error parsing article from {url}: {e}")
+        return ""
+
+def fetch_full_article_texts(rows, download_workers=DEFAULT_DOWNLOAD_WORKERS, parse_workers=DEFAULT_PARSE_WORKERS, timeout=ARTICLE_DOWNLOAD_TIMEOUT, article_cache=None):
+    """
+    Batch version of fetch_full_article_text.
+    Pages are downloaded concurrently over one pooled session, and each page is
+    handed to a process pool for parsing as soon as it arrives, so parsing
+    does not hold up the remaining downloads.
+    With an article_cache, recently fetched articles are reused directly and
+    older ones are revalidated with a conditional GET; a 304 reuses the cached text,
+    and so does a revalidation that fails.
+
+    Args:
+        rows (list): Article rows (dicts or Series) with a "url" entry.
+
+    Returns:
+        list: The article text for each row, "" where download or parsing failed.
+    """
+    urls = [row.get("url") or "" for row in rows]
+    texts = [""] * len(urls)
+    cached_entries = {}
+    to_download = []
+    for i, url in enumerate(urls):
+        if not url:
+            continue
+        entry = article_cache.lookup(url) if article_cache is not None else None
+        if entry is not None and article_cache.is_fresh(entry):
+            texts[i] = entry["text"]
+            continue
+        cached_entries[i] = entry
+        to_download.append(i)
+    if not to_download:
+        return texts
+    logger.info("Downloading %s of %s articles", len(to_download), len(urls))
+    with new_http_session(download_workers) as session, \
+            ThreadPoolExecutor(max_workers=download_workers) as downloader, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parser:
+        downloads = {
+            downloader.submit(
+                download_article_html, urls[i], session, timeout, ArticleCache.conditional_headers(cached_entries[i])
+            ): i
+            for i in to_download
+        }
+        parses = {}
+        validators = {}
+        for future in as_completed(downloads):
+            i = downloads[future]
+            status, html, etag, last_modified = future.result()
+            if status == 304 and cached_entries[i] is not None:
+                texts[i] = cached_entries[i]["text"]
+                article_cache.store(urls[i], texts[i], cached_entries[i].get("etag"), cached_entries[i].get("last_modified"))
+            elif html:
+                validators[i] = (etag, last_modified)
+                parses[parser.submit(parse_article_html, urls[i], html)] = i
+            elif cached_entries[i] is not None:
+                # Revalidation failed (timeout, connection error or error status): keep the stale text.
+                texts[i] = cached_entries[i]["text"]
+        for future in as_completed(parses):
+            i = parses[future]
+            try:
+                texts[i] = future.result()
+            except Exception as e:
+                print(f"Error parsing article from {urls[i]}: {e}")
+            if not texts[i]:
+                if cached_entries[i] is not None:
+                    texts[i] = cached_entries[i]["text"]
+                continue
+            if article_cache is not None:
+                article_cache.store(urls[i], texts[i], *validators[i])
+    if article_cache is not None:
+        logger.info("Article cache: %s", article_cache.stats())
+    return texts
@@ -0,0 +1,222 @@
+"""
+OpenAI Batch API support for non-interactive runs. Chat requests are written to
+a JSONL file and submitted as a batch; the run then stops with BatchPending
+instead of waiting. A later run with the same batch name finds the saved batch
+IDs and, once the batches have finished, returns the message contents keyed by
+custom_id.
+
+LocalBatchClient implements the same submit/status/results interface on local
+files, so batch runs can be exercised offline.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WORK_DIR = os.path.join("cache", "batches")
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+# The Batch API accepts at most this many requests per input file.
+MAX_REQUESTS_PER_BATCH = 50000
+FINISHED_BATCH_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchPending(Exception):
+    """
+    Raised when a batch job was submitted or is still running; run again later to collect it.
+    """
+
+    def __init__(self, name, batch_ids, statuses=None):
+        self.name = name
+        self.batch_ids = batch_ids
+        self.statuses = statuses or {}
+        super().__init__(f"Batch job '{name}' is not finished yet ({', '.join(batch_ids)}); run again later to collect it.")
+
+
+def batch_request_id(body):
+    """
+    Returns a custom_id derived from the request body, so results collected on a
+    later run map back to requests by content rather than by position.
+    """
+    return "req-" + hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def build_chat_request(custom_id, body):
+    """
+    Returns one line of a Batch API input file for a chat completions request body.
+    """
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def write_batch_jsonl(requests, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+
+
+def parse_batch_output(text):
+    """
+    Reads Batch API output lines into {custom_id: message content}. Failed requests map to None.
+    """
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        content = None
+        if response.get("status_code") == 200:
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                content = None
+        else:
+            logger.info("Batch request %s failed: %s", record.get("custom_id"), record.get("error") or response)
+        results[record.get("custom_id")] = content
+    return results
+
+
+class OpenAIBatchClient:
+    """
+    Submits JSONL files to the OpenAI Batch API and reads back their output.
+    """
+
+    def __init__(self, openai_client):
+        self.openai_client = openai_client
+
+    def submit(self, jsonl_path, description=""):
+        with open(jsonl_path, "rb") as f:
+            input_file = self.openai_client.files.create(file=f, purpose="batch")
+        batch = self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+            metadata={"description": description},
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        return self.openai_client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id):
+        """
+        Returns {custom_id: content} for every request in the batch's output and error files.
+        """
+        batch = self.openai_client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.error_file_id, batch.output_file_id):
+            if file_id:
+                results.update(parse_batch_output(self.openai_client.files.content(file_id).text))
+        return results
+
+
+class LocalBatchClient:
+    """
+    File-based stand-in for the Batch API. A submitted batch is answered on its
+    first status poll by calling respond(request_body) for each line, and the
+    output is written in the Batch API's output format.
+    """
+
+    def __init__(self, batch_dir, respond=None):
+        if not os.path.exists(batch_dir):
+            os.makedirs(batch_dir)
+        self.batch_dir = batch_dir
+        self.respond = respond or (lambda body: "{}")
+
+    def _path(self, batch_id, name):
+        return os.path.join(self.batch_dir, f"{batch_id}.{name}")
+
+    def submit(self, jsonl_path, description=""):
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        with open(jsonl_path, "r", encoding="utf-8") as src, open(self._path(batch_id, "input.jsonl"), "w", encoding="utf-8") as dst:
+            dst.write(src.read())
+        with open(self._path(batch_id, "status"), "w") as f:
+            f.write("validating")
+        return batch_id
+
+    def status(self, batch_id):
+        with open(self._path(batch_id, "status")) as f:
+            status = f.read().strip()
+        if status == "validating":
+            self._run(batch_id)
+            status = "completed"
+        return status
+
+    def results(self, batch_id):
+        with open(self._path(batch_id, "output.jsonl"), encoding="utf-8") as f:
+            return parse_batch_output(f.read())
+
+    def _run(self, batch_id):
+        with open(self._path(batch_id, "input.jsonl"), encoding="utf-8") as src, open(self._path(batch_id, "output.jsonl"), "w", encoding="utf-8") as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                content = self.respond(request["body"])
+                dst.write(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]},
+                    },
+                    "error": None,
+                }) + "\n")
+        with open(self._path(batch_id, "status"), "w") as f:
+            f.write("completed")
+
+
+def run_chat_batch(batch_client, requests, name, work_dir=DEFAULT_BATCH_WORK_DIR):
+    """
+    Runs {custom_id: chat request body} through the Batch API without waiting for it.
+
+    The first call submits the requests, saves the batch IDs in work_dir under
+    name and raises BatchPending. Later calls with the same name check those
+    batches once: while any is unfinished they raise BatchPending again; once all
+    have finished they return {custom_id: message content} for requests.
+    Requests the batches did not answer (a failed or expired batch, a failed line,
+    or a request that was not part of the submission) map to None; callers rerun
+    them synchronously.
+    """
+    if not requests:
+        return {}
+    if not os.path.exists(work_dir):
+        os.makedirs(work_dir)
+    state_path = os.path.join(work_dir, f"{name}.batch_ids")
+    if not os.path.exists(state_path):
+        lines = [build_chat_request(custom_id, body) for custom_id, body in requests.items()]
+        batch_ids = []
+        for part, start in enumerate(range(0, len(lines), MAX_REQUESTS_PER_BATCH)):
+            jsonl_path = os.path.join(work_dir, f"{name}.{part}.jsonl")
+            write_batch_jsonl(lines[start:start + MAX_REQUESTS_PER_BATCH], jsonl_path)
+            batch_ids.append(batch_client.submit(jsonl_path, description=name))
+        with open(state_path, "w") as f:
+            f.write("\n".join(batch_ids))
+        logger.info("Submitted %s requests as batches %s", len(lines), batch_ids)
+        raise BatchPending(name, batch_ids)
+
+    with open(state_path) as f:
+        batch_ids = [line.strip() for line in f if line.strip()]
+    statuses = {batch_id: batch_client.status(batch_id) for batch_id in batch_ids}
+    if any(status not in FINISHED_BATCH_STATUSES for status in statuses.values()):
+        logger.info("Batches for '%s' not finished yet: %s", name, statuses)
+        raise BatchPending(name, batch_ids, statuses)
+
+    collected = {}
+    for batch_id, status in statuses.items():
+        if status != "completed":
+            logger.warning("Batch %s finished with status '%s'; using its partial results", batch_id, status)
+        collected.update(batch_client.results(batch_id))
+    os.remove(state_path)
+    for fname in os.listdir(work_dir):
+        if fname.startswith(f"{name}.") and fname.endswith(".jsonl"):
+            os.remove(os.path.join(work_dir, fname))
+    results = {custom_id: collected.get(custom_id) for custom_id in requests}
+    missing = sum(content is None for content in results.values())
+    if missing:
+        logger.warning("%s of %s batch requests returned no result", missing, len(requests))
+    return results
@@ -0,0 +1,315 @@
+"""
+Shared call layer for OpenAI requests. OpenAI rate limits are per model, so
+every chat and embeddings call goes through the OpenAIRateLimiter of its model,
+which:
+  - spends from requests-per-minute and tokens-per-minute buckets before sending,
+  - resizes those buckets from the x-ratelimit-* response headers,
+  - caps requests in flight with an AIMD limit (grow by one per window of
+    successes, halve on a 429),
+  - retries 429s, timeouts, connection errors and 5xx with jittered backoff.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# Conservative starting limits; the x-ratelimit-* headers replace them after the first response.
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_MIN_IN_FLIGHT = 1
+DEFAULT_MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_MAX_SECONDS = 60
+# Completion tokens assumed for a chat request without max_tokens.
+DEFAULT_COMPLETION_TOKENS = 500
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset_duration(value):
+    """
+    Parses x-ratelimit-reset-* values such as "20ms", "1.5s" or "6m0s" into seconds.
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(str(value))
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(payload, completion_tokens=0):
+    """
+    Rough token count (4 characters per token) of a request payload plus the completion budget.
+    """
+    if isinstance(payload, str):
+        chars = len(payload)
+    elif isinstance(payload, dict):
+        chars = sum(len(str(value)) for value in payload.values())
+    else:
+        # A list of chat messages or of embedding inputs.
+        chars = sum(len(str(part.get("content", "") if isinstance(part, dict) else part)) for part in payload or [])
+    return chars // 4 + 1 + completion_tokens
+
+
+class TokenBucket:
+    """
+    Refills capacity units per minute. reserve() may drive the balance negative;
+    the caller then waits for the returned time, which keeps requests in arrival order.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+    def reserve(self, amount):
+        """
+        Takes amount units and returns the seconds to wait before they are actually available.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.available -= amount
+        if self.available >= 0:
+            return 0.0
+        return -self.available * 60 / self.capacity
+
+    def update(self, limit=None, remaining=None):
+        now = time.monotonic()
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.available = min(self.available, float(remaining))
+
+
+class OpenAIRateLimiter:
+    """
+    Thread-safe limiter for one model, shared by sync and async callers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        min_in_flight=DEFAULT_MIN_IN_FLIGHT,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min_in_flight
+        self.concurrency_limit = float(max(min_in_flight, max_in_flight // 2))
+        self.in_flight = 0
+        self.throttled = 0
+        self._condition = threading.Condition()
+
+    def _try_start(self):
+        with self._condition:
+            if self.in_flight < int(self.concurrency_limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def _reserve(self, tokens):
+        with self._condition:
+            return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens):
+        """
+        Blocks until a request of about tokens tokens may be sent.
+        """
+        with self._condition:
+            while self.in_flight >= int(self.concurrency_limit):
+                self._condition.wait()
+            self.in_flight += 1
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens):
+        while not self._try_start():
+            await asyncio.sleep(0.05)
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, headers=None, throttled=False):
+        """
+        Ends a request: updates the buckets from its headers and adjusts the concurrency limit.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if headers is not None:
+                self.update_from_headers(headers)
+            if throttled:
+                self.throttled += 1
+                self.concurrency_limit = max(self.min_in_flight, self.concurrency_limit / 2)
+            else:
+                # Additive increase: one more slot per concurrency_limit successful requests.
+                self.concurrency_limit = min(self.max_in_flight, self.concurrency_limit + 1 / self.concurrency_limit)
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers):
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        self.requests.update(number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"))
+        self.tokens.update(number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"))
+
+    def stats(self):
+        with self._condition:
+            return {
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "requests_per_minute": self.requests.capacity,
+                "tokens_per_minute": self.tokens.capacity,
+                "throttled": self.throttled,
+            }
+
+
+_default_limiters = {}
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter(model=None):
+    """
+    Returns the process-wide limiter for model, used when a call does not pass its own.
+    Each model has its own buckets and concurrency limit, so headers from one
+    model's responses never resize another's limits.
+    """
+    with _default_limiter_lock:
+        if model not in _default_limiters:
+            _default_limiters[model] = OpenAIRateLimiter()
+        return _default_limiters[model]
+
+
+def default_limiter_stats():
+    """
+    Returns {model: stats} for every process-wide limiter created so far.
+    """
+    with _default_limiter_lock:
+        limiters = dict(_default_limiters)
+    return {model: limiter.stats() for model, limiter in limiters.items()}
+
+
+def retry_delay(attempt, error=None):
+    """
+    Returns the wait before retry attempt + 1: the server's retry-after when given,
+    otherwise exponential backoff with full jitter.
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        headers = response.headers
+        if headers.get("retry-after-ms"):
+            try:
+                return float(headers["retry-after-ms"]) / 1000
+            except ValueError:
+                pass
+        if headers.get("retry-after"):
+            try:
+                return float(headers["retry-after"])
+            except ValueError:
+                pass
+        reset = max(
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0,
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0,
+        )
+        if reset:
+            return min(reset, BACKOFF_MAX_SECONDS) + random.uniform(0, 1)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def error_headers(error):
+    response = getattr(error, "response", None)
+    return response.headers if response is not None else None
+
+
+def call_with_limits(create, tokens, limiter=None, max_retries=DEFAULT_MAX_RETRIES, **kwargs):
+    """
+    Calls create (a with_raw_response.create method) under the limiter and returns
+    the parsed response. Without a limiter, the default limiter of kwargs["model"] is used.
+    """
+    limiter = limiter or get_default_limiter(kwargs.get("model"))
+    for attempt in range(max_retries + 1):
+        limiter.acquire(tokens)
+        try:
+            raw = create(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            limiter.release(error_headers(e), throttled=isinstance(e, RateLimitError))
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt, e)
+            logger.warning("OpenAI request failed (%s); retrying in %.1fs", type(e).__name__, delay)
+            time.sleep(delay)
+            continue
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release(raw.headers)
+        return raw.parse()
+
+
+async def call_with_limits_async(create, tokens, limiter=None, max_retries=DEFAULT_MAX_RETRIES, **kwargs):
+    """
+    Async counterpart of call_with_limits.
+    """
+    limiter = limiter or get_default_limiter(kwargs.get("model"))
+    for attempt in range(max_retries + 1):
+        await limiter.acquire_async(tokens)
+        try:
+            raw = await create(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            limiter.release(error_headers(e), throttled=isinstance(e, RateLimitError))
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt, e)
+            logger.warning("OpenAI request failed (%s); retrying in %.1fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release(raw.headers)
+        return raw.parse()
+
+
+def chat_completion(gpt_client, limiter=None, **kwargs):
+    """
+    chat.completions.create through the shared limiter. The client's own retries
+    are turned off so that backoff happens in one place.
+    """
+    tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+    client = gpt_client.with_options(max_retries=0)
+    return call_with_limits(client.chat.completions.with_raw_response.create, tokens, limiter, **kwargs)
+
+
+async def chat_completion_async(gpt_client, limiter=None, **kwargs):
+    tokens = estimate_tokens(kwargs.get("messages"), kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+    client = gpt_client.with_options(max_retries=0)
+    return await call_with_limits_async(client.chat.completions.with_raw_response.create, tokens, limiter, **kwargs)
+
+
+def create_embeddings(openai_client, limiter=None, **kwargs):
+    """
+    embeddings.create through the shared limiter.
+    """
+    payload = kwargs.get("input")
+    tokens = estimate_tokens(payload if isinstance(payload, list) else [payload])
+    client = openai_client.with_options(max_retries=0)
+    return call_with_limits(client.embeddings.with_raw_response.create, tokens, limiter, **kwargs)
@@ -1,12 +1,46 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+import asyncio
+import functools
+import math
 import os
 import pandas as pd
 import string
 import json
+import tiktoken
 from site_text.questions import PROJECT_STATUS
+from utils.prefilter import evaluate_prefilter
+from utils.dedup import cluster_near_duplicates, DEFAULT_DEDUP_THRESHOLD
+from utils.question_stats import rank_questions, QUESTION_ORDERS, DEFAULT_QUESTION_ORDER
+from services.openai_limiter import chat_completion, chat_completion_async
+from services.openai_batch import OpenAIBatchClient, batch_request_id, run_chat_batch
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+# Maximum number of screening requests in flight at once.
+DEFAULT_MAX_CONCURRENCY = 8
+# "iterative": one request per (headline, question), stopping at the first "yes".
+# "multi": one JSON-mode request per headline answering every question.
+# "batch": one JSON-mode request per packed group of headlines.
+# "openai_batch": the "multi" prompt for every headline as one Batch API job.
+# "logprob": like "iterative", but each answer is a single token scored from its logprobs.
+SCREENING_MODES = ["iterative", "multi", "batch", "openai_batch", "logprob"]
+DEFAULT_SCREENING_MODE = "iterative"
+# "logprob" mode: alternatives read per answer token, and the confidence below
+# which an answer is asked again as a free-text second opinion (None disables it).
+LOGPROB_TOP_K = 5
+DEFAULT_ESCALATION_THRESHOLD = 0.75
+# Token budget for the numbered headlines packed into one "batch" request.
+DEFAULT_BATCH_TOKEN_BUDGET = 2000
+DEFAULT_MAX_BATCH_SIZE = 40
+# Versions of the screening prompts, part of the verdict cache key.
+# Bump one when its prompt changes so verdicts from the old wording are not reused.
+SINGLE_QUESTION_PROMPT_VERSION = "single-v1"
+MULTI_QUESTION_PROMPT_VERSION = "multi-v1"
+LOGPROB_PROMPT_VERSION = "logprob-v1"
+BATCH_PROMPT_VERSION = "batch-v1"
+VARIABLE_PROMPT_VERSION = "variable-v1"
+
 def new_openai_session(openai_apikey):
     os.environ["OPENAI_API_KEY"] = openai_apikey
     client = OpenAI()
@@ -31,7 +65,19 @@ def create_gpt_messages(query, run_on_full_text):
 
 
 def chat_gpt_query(gpt_client, gpt_model, resp_fmt, msgs):
-    response = gpt_client.chat.completions.create(
+    response = chat_completion(
+        gpt_client,
+        model=gpt_model,
+        temperature=0,
+        response_format={"type": resp_fmt},
+        messages=msgs,
+    )
+    return response.choices[0].message.content
+
+
+async def chat_gpt_query_async(gpt_client, gpt_model, resp_fmt, msgs):
+    response = await chat_completion_async(
+        gpt_client,
         model=gpt_model,
         temperature=0,
         response_format={"type": resp_fmt},
@@ -49,8 +95,194 @@ def fetch_variable_info(gpt_client, gpt_model, query, resp_fmt, run_on_full_text
     follow_up_response = chat_gpt_query(gpt_client, gpt_model, resp_fmt, msgs)
     return follow_up_response"""
 
+
+async def fetch_variable_info_async(gpt_client, gpt_model, query, resp_fmt, run_on_full_text):
+    msgs = create_gpt_messages(query, run_on_full_text)
+    return await chat_gpt_query_async(gpt_client, gpt_model, resp_fmt, msgs)
+
+
+def build_relevance_query(question, headline):
+    return (
+        f'Forget all previous instructions. Answer this question to the best of your ability: {question}. '
+        f'Please respond with only "yes" or "no". Here is the headline: {headline}'
+    )
+
+
+def parse_yes_no_response(response):
+    """
+    Normalizes a GPT answer to "yes" or "no"; returns None if it is neither.
+    """
+    response_cleaned = (response or "").strip().lower().translate(str.maketrans('', '', string.punctuation))
+    return response_cleaned if response_cleaned in ["yes", "no"] else None
+
+
+def yes_probability(logprobs):
+    """
+    Returns P(yes) normalized over the "yes" and "no" variants (case, spacing,
+    punctuation) among the first token's top logprobs, or None if neither appears.
+    """
+    content = getattr(logprobs, "content", None)
+    if not content:
+        return None
+    probabilities = {"yes": 0.0, "no": 0.0}
+    for candidate in content[0].top_logprobs or []:
+        token = candidate.token.strip().lower().translate(str.maketrans('', '', string.punctuation))
+        if token in probabilities:
+            probabilities[token] += math.exp(candidate.logprob)
+    total = probabilities["yes"] + probabilities["no"]
+    if total == 0:
+        return None
+    return probabilities["yes"] / total
+
+
+async def fetch_yes_probability_async(gpt_client, gpt_model, query, run_on_full_text):
+    """
+    Asks a yes/no question with a one-token answer and returns P(yes) from its logprobs (None if unusable).
+    """
+    msgs = create_gpt_messages(query, run_on_full_text)
+    response = await chat_completion_async(
+        gpt_client,
+        model=gpt_model,
+        temperature=0,
+        max_tokens=1,
+        logprobs=True,
+        top_logprobs=LOGPROB_TOP_K,
+        messages=msgs,
+    )
+    return yes_probability(response.choices[0].logprobs)
+
+
+def strip_json_fences(output):
+    output = (output or "").strip()
+    if output.startswith("```json"):
+        output = output[len("```json"):].strip()
+    if output.endswith("```"):
+        output = output[:-3].strip()
+    return output
+
+
+def build_multi_question_query(questions, headline):
+    numbered_questions = "\n".join(f"{i}. {question}" for i, question in enumerate(questions, start=1))
+    return (
+        "Forget all previous instructions. Answer each of the numbered questions below about the headline "
+        "to the best of your ability.\n"
+        'Return a JSON object whose keys are the question numbers as strings ("1", "2", ...) and whose values '
+        'are only "yes" or "no".\n\n'
+        f"Questions:\n{numbered_questions}\n\n"
+        f"Here is the headline: {headline}"
+    )
+
+
+def parse_multi_question_answers(response, questions):
+    """
+    Maps a JSON response from build_multi_question_query back onto the questions.
+
+    Returns:
+        dict: question text -> "yes", "no", or None where the response is
+        malformed or has no usable answer, in question order.
+    """
+    try:
+        parsed = json.loads(strip_json_fences(response))
+    except ValueError:
+        logger.info("Could not parse multi-question response: %s", response)
+        parsed = {}
+    if not isinstance(parsed, dict):
+        parsed = {}
+    # Accept {"answers": {...}} as well as a flat object.
+    if isinstance(parsed.get("answers"), dict):
+        parsed = parsed["answers"]
+    answers = {}
+    for i, question in enumerate(questions, start=1):
+        answer = parsed.get(str(i), parsed.get(question))
+        answers[question] = parse_yes_no_response(answer) if isinstance(answer, str) else None
+    return answers
+
+def get_token_encoder(gpt_model):
+    try:
+        return tiktoken.encoding_for_model(gpt_model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def build_headline_batches(headlines, gpt_model, token_budget=DEFAULT_BATCH_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Groups (index, headline) pairs so the headlines of each group stay under
+    token_budget tokens and max_batch_size items. A headline longer than the
+    budget gets a group of its own.
+    """
+    enc = get_token_encoder(gpt_model)
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    for index, headline in headlines:
+        # Count the "N. " numbering and newline along with the headline itself.
+        tokens = len(enc.encode(headline)) + 4
+        if current_batch and (current_tokens + tokens > token_budget or len(current_batch) >= max_batch_size):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+        current_batch.append((index, headline))
+        current_tokens += tokens
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def build_batch_screening_query(questions, headlines):
+    numbered_questions = "\n".join(f"- {question}" for question in questions)
+    numbered_headlines = "\n".join(f"{i}. {headline}" for i, headline in enumerate(headlines, start=1))
+    return (
+        "Forget all previous instructions. For each numbered headline below, decide whether the answer to "
+        "ANY of the following questions is \"yes\" for that headline.\n\n"
+        f"Questions:\n{numbered_questions}\n\n"
+        f"Headlines:\n{numbered_headlines}\n\n"
+        'Return a JSON object with one entry per headline, whose keys are the headline numbers as strings '
+        '("1", "2", ...) and whose values are only "yes" (at least one question applies) or "no" (none apply).'
+    )
+
+
+def parse_batch_screening_response(response, num_items):
+    """
+    Parses a response from build_batch_screening_query.
+
+    Returns:
+        dict: item number (1-based) -> "yes" or "no" for every well-formed item.
+        Items missing from the response or with any other answer are left out
+        so the caller can retry them individually.
+    """
+    try:
+        parsed = json.loads(strip_json_fences(response))
+    except ValueError:
+        logger.info("Could not parse batch screening response: %s", response)
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    verdicts = {}
+    for i in range(1, num_items + 1):
+        answer = parsed.get(str(i))
+        if not isinstance(answer, str):
+            continue
+        answer_cleaned = answer.strip().lower().translate(str.maketrans('', '', string.punctuation))
+        if answer_cleaned in ["yes", "no"]:
+            verdicts[i] = answer_cleaned
+    return verdicts
+
+def get_cached_verdict(verdict_cache, headline, question, gpt_model, prompt_version):
+    if verdict_cache is None:
+        return None
+    return verdict_cache.get_verdict(headline, question, gpt_model, prompt_version)
+
+
+def store_verdict(verdict_cache, headline, question, gpt_model, prompt_version, verdict):
+    """
+    Caches a parsed answer. verdict is None when the response could not be parsed;
+    the "no" it defaults to is a guess and is not cached, so the next run asks again.
+    """
+    if verdict_cache is not None and verdict is not None:
+        verdict_cache.set_verdict(headline, question, gpt_model, prompt_version, verdict)
+
 def query_gpt_for_relevance(
-    gpt_analyzer, df, variable_specs, run_on_full_text, gpt_client, gpt_model
+    gpt_analyzer, df, variable_specs, run_on_full_text, gpt_client, gpt_model, verdict_cache=None
 ):
 
     logger.info("Querying each element in the dataframe...")
@@ -62,26 +294,32 @@ def query_gpt_for_relevance(
             "Title": row.get("title", "Unknown Title")  # Store article title
         }  
         for var_name, var_desc in variable_specs.items():
+            cache_question = f"{var_name}: {var_desc}"
+            cached = get_cached_verdict(verdict_cache, row["text_column"], cache_question, gpt_model, VARIABLE_PROMPT_VERSION)
+            if cached is not None:
+                row_results[var_name] = cached
+                continue
             query = f'Please respond with only "yes" or "no". Is this relevant to "{var_name}", given "{var_desc}"?\n\nContent:\n"""{row["text_column"]}"""'
             resp_fmt = gpt_analyzer.resp_format_type()
             response = fetch_variable_info(gpt_client, gpt_model, query, resp_fmt, run_on_full_text)
             # Ensure response is stripped and standardized
-            response_cleaned = response.strip().lower().translate(str.maketrans('', '', string.punctuation))
-            if response_cleaned not in ["yes", "no"]:
-                response_cleaned = "no"  # Default to "no" if unexpected response
+            response_parsed = parse_yes_no_response(response)
+            response_cleaned = response_parsed or "no"  # Default to "no" if unexpected response
             
             row_results[var_name] = response_cleaned  # Store response under variable name
+            store_verdict(verdict_cache, row["text_column"], cache_question, gpt_model, VARIABLE_PROMPT_VERSION, response_parsed)
         
         results.append(row_results)
 
     return pd.DataFrame(results)
 
-def query_gpt_for_relevance_iterative(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model):
+def query_gpt_for_relevance_iterative(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, verdict_cache=None):
     """
     Iterates through target_questions for each article in df.
     For each article, it asks each question until one returns "yes".
     If any question returns "yes", the article is marked as irrelevant ("no").
     Otherwise, it's marked as relevant ("yes").
+    Answers found in verdict_cache are reused instead of querying GPT.
     
     Returns:
         pd.DataFrame: A DataFrame with one row per article including the article index, title, and a "relevant" flag.
@@ -90,17 +328,17 @@ def query_gpt_for_relevance_iterative(gpt_analyzer, df, target_questions, run_on
     for index, row in df.iterrows():
         is_irrelevant = False
         for question in target_questions:
-            query = (
-                f'Forget all previous instructions. Answer this question to the best of your ability: {question}. '
-                f'Please respond with only "yes" or "no". Here is the headline: {row["text_column"]}'
-            )
-            resp_fmt = gpt_analyzer.resp_format_type()
-            response = fetch_variable_info(gpt_client, gpt_model, query, resp_fmt, run_on_full_text)
-            logger.info("Response: %s", response)
-            response_cleaned = response.strip().lower().translate(str.maketrans('', '', string.punctuation))
-            if response_cleaned not in ["yes", "no"]:
-                response_cleaned = "no"
-            if response_cleaned == "yes":
+            query = build_relevance_query(question, row["text_column"])
+            answer = get_cached_verdict(verdict_cache, row["text_column"], question, gpt_model, SINGLE_QUESTION_PROMPT_VERSION)
+            if answer is None:
+                resp_fmt = gpt_analyzer.resp_format_type()
+                response = fetch_variable_info(gpt_client, gpt_model, query, resp_fmt, run_on_full_text)
+                logger.info("Response: %s", response)
+                parsed = parse_yes_no_response(response)
+                store_verdict(verdict_cache, row["text_column"], question, gpt_model, SINGLE_QUESTION_PROMPT_VERSION, parsed)
+                # An unexpected answer counts as "no" for this run only.
+                answer = parsed or "no"
+            if answer == "yes":
                 is_irrelevant = True
                 print("Skipping article due to query: ", query)
                 break
@@ -111,6 +349,642 @@ def query_gpt_for_relevance_iterative(gpt_analyzer, df, target_questions, run_on
         })
     return pd.DataFrame(results)
 
+
+async def screen_headline_async(gpt_analyzer, index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache=None):
+    """
+    Asks target_questions for one headline in order, stopping at the first "yes".
+    Each request holds the semaphore only while it is in flight, so other
+    headlines can use the slot between questions.
+    """
+    is_irrelevant = False
+    answers = {}
+    fresh_answers = {}
+    skipped = []
+    resp_fmt = gpt_analyzer.resp_format_type()
+    for position, question in enumerate(target_questions):
+        query = build_relevance_query(question, row["text_column"])
+        answer = get_cached_verdict(verdict_cache, row["text_column"], question, gpt_model, SINGLE_QUESTION_PROMPT_VERSION)
+        if answer is None:
+            async with semaphore:
+                response = await fetch_variable_info_async(gpt_client, gpt_model, query, resp_fmt, run_on_full_text)
+            logger.info("Response: %s", response)
+            parsed = parse_yes_no_response(response)
+            store_verdict(verdict_cache, row["text_column"], question, gpt_model, SINGLE_QUESTION_PROMPT_VERSION, parsed)
+            if parsed is not None:
+                fresh_answers[question] = parsed
+            # An unexpected answer counts as "no" for this run only.
+            answer = parsed or "no"
+        answers[question] = answer
+        if answer == "yes":
+            is_irrelevant = True
+            if question in fresh_answers:
+                skipped = list(target_questions[position + 1:])
+            logger.info("Skipping article due to query: %s", query)
+            break
+    return {
+        "index": index,
+        "title": row.get("title", "Unknown Title"),
+        "relevant": "no" if is_irrelevant else "yes",
+        "answers": answers,
+        "fresh_answers": fresh_answers,
+        "skipped": skipped,
+    }
+
+
+async def query_gpt_for_relevance_async(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None):
+    """
+    Async counterpart of query_gpt_for_relevance_iterative that screens all
+    headlines at once, with at most max_concurrency requests in flight.
+
+    Returns:
+        pd.DataFrame: Same index/title/relevant layout as the iterative version, in df order,
+        plus an "answers" column with the questions asked for each article and their answers.
+        "fresh_answers" holds the answers GPT gave in this run (not from the cache), and
+        "skipped" the questions a fresh "yes" left unasked; QuestionStats records those.
+    """
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    tasks = [
+        screen_headline_async(gpt_analyzer, index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache)
+        for index, row in df.iterrows()
+    ]
+    results = await asyncio.gather(*tasks)
+    return pd.DataFrame(results, columns=["index", "title", "relevant", "answers", "fresh_answers", "skipped"])
+
+
+async def screen_headline_logprob_async(gpt_analyzer, index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache=None, escalation_threshold=DEFAULT_ESCALATION_THRESHOLD, escalation_model=None):
+    """
+    Asks target_questions in order with one-token answers, stopping at the first "yes".
+    The confidence of an answer is max(P(yes), P(no)). Answers below
+    escalation_threshold are asked again with the free-text prompt on
+    escalation_model (gpt_model by default), and that answer is kept. An
+    escalated answer is cached under the model and prompt that produced it,
+    and a later run reuses it before asking for logprobs again.
+    """
+    answers = {}
+    fresh_answers = {}
+    skipped = []
+    confidences = {}
+    escalated = []
+    for position, question in enumerate(target_questions):
+        query = build_relevance_query(question, row["text_column"])
+        answer = get_cached_verdict(verdict_cache, row["text_column"], question, gpt_model, LOGPROB_PROMPT_VERSION)
+        if answer is None and escalation_threshold is not None:
+            answer = get_cached_verdict(
+                verdict_cache, row["text_column"], question, escalation_model or gpt_model, SINGLE_QUESTION_PROMPT_VERSION
+            )
+        if answer is None:
+            async with semaphore:
+                p_yes = await fetch_yes_probability_async(gpt_client, gpt_model, query, run_on_full_text)
+            # parsed stays None when neither the logprobs nor the escalated answer are usable; that "no" is not cached.
+            parsed = None if p_yes is None else ("yes" if p_yes >= 0.5 else "no")
+            confidence = max(p_yes, 1 - p_yes) if p_yes is not None else 0.0
+            if escalation_threshold is not None and confidence < escalation_threshold:
+                async with semaphore:
+                    response = await fetch_variable_info_async(
+                        gpt_client, escalation_model or gpt_model, query, gpt_analyzer.resp_format_type(), run_on_full_text
+                    )
+                parsed = parse_yes_no_response(response)
+                escalated.append(question)
+                logger.info("Escalated low-confidence answer (%.2f) for headline %s: %s", confidence, index, parsed or "no")
+                # The free-text answer came from the escalation model with the single-question prompt.
+                store_verdict(
+                    verdict_cache, row["text_column"], question, escalation_model or gpt_model, SINGLE_QUESTION_PROMPT_VERSION, parsed
+                )
+            else:
+                store_verdict(verdict_cache, row["text_column"], question, gpt_model, LOGPROB_PROMPT_VERSION, parsed)
+            answer = parsed or "no"
+            confidences[question] = round(confidence, 4)
+            if parsed is not None:
+                fresh_answers[question] = parsed
+        answers[question] = answer
+        if answer == "yes":
+            if question in fresh_answers:
+                skipped = list(target_questions[position + 1:])
+            logger.info("Skipping article due to query: %s", query)
+            break
+    is_irrelevant = "yes" in answers.values()
+    if is_irrelevant:
+        # The verdict rests on the question that fired; otherwise on the least certain "no".
+        deciding = [question for question, answer in answers.items() if answer == "yes"]
+    else:
+        deciding = list(answers)
+    known = [confidences[question] for question in deciding if question in confidences]
+    return {
+        "index": index,
+        "title": row.get("title", "Unknown Title"),
+        "relevant": "no" if is_irrelevant else "yes",
+        "answers": answers,
+        "fresh_answers": fresh_answers,
+        "skipped": skipped,
+        "confidence": min(known) if known else None,
+        "escalated": escalated,
+    }
+
+
+async def query_gpt_for_relevance_logprob_async(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None, escalation_threshold=DEFAULT_ESCALATION_THRESHOLD, escalation_model=None):
+    """
+    Screens all headlines with one-token, logprob-scored answers.
+
+    Returns:
+        pd.DataFrame: index/title/relevant/answers columns plus "confidence"
+        (None when every answer came from the cache) and "escalated" (questions
+        that were asked again).
+    """
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    tasks = [
+        screen_headline_logprob_async(
+            gpt_analyzer, index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore,
+            verdict_cache, escalation_threshold, escalation_model
+        )
+        for index, row in df.iterrows()
+    ]
+    results = await asyncio.gather(*tasks)
+    escalations = sum(len(result["escalated"]) for result in results)
+    logger.info("Logprob screening escalated %s answers", escalations)
+    return pd.DataFrame(
+        results, columns=["index", "title", "relevant", "answers", "fresh_answers", "skipped", "confidence", "escalated"]
+    )
+
+
+def query_gpt_for_relevance_logprob(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None, escalation_threshold=DEFAULT_ESCALATION_THRESHOLD, escalation_model=None):
+    """
+    Synchronous entry point for the logprob screening mode.
+    """
+    return run_with_async_client(
+        gpt_client,
+        lambda async_client: query_gpt_for_relevance_logprob_async(
+            gpt_analyzer, df, target_questions, run_on_full_text, async_client, gpt_model, max_concurrency,
+            verdict_cache, escalation_threshold, escalation_model
+        ),
+    )
+
+
+def async_client_from(gpt_client):
+    """
+    Builds an AsyncOpenAI client with the same key, organization, project,
+    base URL, timeout, retries and extra headers/query as a synchronous client.
+    """
+    return AsyncOpenAI(
+        api_key=gpt_client.api_key,
+        organization=gpt_client.organization,
+        project=gpt_client.project,
+        base_url=gpt_client.base_url,
+        timeout=gpt_client.timeout,
+        max_retries=gpt_client.max_retries,
+        default_headers=gpt_client._custom_headers,
+        default_query=gpt_client._custom_query,
+    )
+
+
+def run_with_async_client(gpt_client, make_coro):
+    """
+    Runs make_coro(async_client) to completion from synchronous code. gpt_client
+    may already be an AsyncOpenAI client; a synchronous one is mirrored with
+    async_client_from and the copy is closed afterwards.
+    """
+    async def run():
+        if isinstance(gpt_client, AsyncOpenAI):
+            return await make_coro(gpt_client)
+        async_client = async_client_from(gpt_client)
+        try:
+            return await make_coro(async_client)
+        finally:
+            await async_client.close()
+
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    return asyncio.run(run())
+
+
+def query_gpt_for_relevance_concurrent(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None):
+    """
+    Synchronous entry point for the async screening engine.
+    """
+    return run_with_async_client(
+        gpt_client,
+        lambda async_client: query_gpt_for_relevance_async(
+            gpt_analyzer, df, target_questions, run_on_full_text, async_client, gpt_model, max_concurrency, verdict_cache
+        ),
+    )
+
+
+async def screen_headline_multi_async(index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache=None):
+    """
+    Asks all target_questions for one headline in a single JSON-mode request.
+    Any "yes" marks the article as irrelevant; per-question answers are kept for auditing.
+    The request is skipped when verdict_cache already holds every answer.
+    """
+    headline = row["text_column"]
+    answers = {
+        question: get_cached_verdict(verdict_cache, headline, question, gpt_model, MULTI_QUESTION_PROMPT_VERSION)
+        for question in target_questions
+    }
+    fresh_answers = {}
+    if any(answer is None for answer in answers.values()):
+        query = build_multi_question_query(target_questions, headline)
+        async with semaphore:
+            response = await fetch_variable_info_async(gpt_client, gpt_model, query, "json_object", run_on_full_text)
+        logger.info("Response: %s", response)
+        parsed = parse_multi_question_answers(response, target_questions)
+        for question, answer in parsed.items():
+            store_verdict(verdict_cache, headline, question, gpt_model, MULTI_QUESTION_PROMPT_VERSION, answer)
+        fresh_answers = {question: answer for question, answer in parsed.items() if answer is not None}
+        answers = {question: answer or "no" for question, answer in parsed.items()}
+    fired_questions = [question for question, answer in answers.items() if answer == "yes"]
+    if fired_questions:
+        logger.info("Skipping article due to questions: %s", fired_questions)
+    return {
+        "index": index,
+        "title": row.get("title", "Unknown Title"),
+        "relevant": "no" if fired_questions else "yes",
+        "answers": answers,
+        "fresh_answers": fresh_answers,
+    }
+
+
+async def query_gpt_for_relevance_multi_async(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None):
+    """
+    Screens every headline with one request carrying all target_questions.
+
+    Returns:
+        pd.DataFrame: index/title/relevant columns plus an "answers" column
+        holding the per-question yes/no dict for each article, and "fresh_answers"
+        with the ones GPT gave in this run.
+    """
+    if not target_questions:
+        # Nothing to ask: every article passes, as in the iterative path.
+        results = [
+            {"index": index, "title": row.get("title", "Unknown Title"), "relevant": "yes", "answers": {}, "fresh_answers": {}}
+            for index, row in df.iterrows()
+        ]
+    else:
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        tasks = [
+            screen_headline_multi_async(index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache)
+            for index, row in df.iterrows()
+        ]
+        results = await asyncio.gather(*tasks)
+    return pd.DataFrame(results, columns=["index", "title", "relevant", "answers", "fresh_answers"])
+
+
+def query_gpt_for_relevance_multi(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None):
+    """
+    Synchronous entry point for the multi-question screening mode.
+    """
+    return run_with_async_client(
+        gpt_client,
+        lambda async_client: query_gpt_for_relevance_multi_async(
+            gpt_analyzer, df, target_questions, run_on_full_text, async_client, gpt_model, max_concurrency, verdict_cache
+        ),
+    )
+
+
+async def screen_headline_batch_async(batch, titles, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache=None):
+    """
+    Screens one packed group of (index, headline) pairs in a single request.
+    Items the response leaves out or garbles are retried one at a time with
+    the multi-question prompt.
+    """
+    query = build_batch_screening_query(target_questions, [headline for _, headline in batch])
+    async with semaphore:
+        response = await fetch_variable_info_async(gpt_client, gpt_model, query, "json_object", run_on_full_text)
+    logger.info("Batch response: %s", response)
+    verdicts = parse_batch_screening_response(response, len(batch))
+    any_question = "\n".join(target_questions)
+    for i, (_, headline) in enumerate(batch, start=1):
+        if i in verdicts:
+            store_verdict(verdict_cache, headline, any_question, gpt_model, BATCH_PROMPT_VERSION, verdicts[i])
+    results = []
+    for i, (index, headline) in enumerate(batch, start=1):
+        if i in verdicts:
+            results.append({
+                "index": index,
+                "title": titles[index],
+                "relevant": "no" if verdicts[i] == "yes" else "yes"
+            })
+            continue
+        logger.info("Retrying headline %s individually", index)
+        row = {"title": titles[index], "text_column": headline}
+        retried = await screen_headline_multi_async(index, row, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache)
+        results.append({key: retried[key] for key in ["index", "title", "relevant"]})
+    return results
+
+
+async def query_gpt_for_relevance_batch_async(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, token_budget=DEFAULT_BATCH_TOKEN_BUDGET, verdict_cache=None):
+    """
+    Screens headlines by packing many of them, as numbered items, into each request.
+    Group sizes adapt to headline length so each request stays under token_budget.
+
+    Returns:
+        pd.DataFrame: Same index/title/relevant layout as the iterative version, in df order.
+    """
+    if not target_questions:
+        return await query_gpt_for_relevance_async(
+            gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency, verdict_cache
+        )
+    titles = {index: row.get("title", "Unknown Title") for index, row in df.iterrows()}
+    # Headlines whose combined verdict is cached skip the batch entirely.
+    any_question = "\n".join(target_questions)
+    results_by_index = {}
+    to_screen = []
+    for index, row in df.iterrows():
+        cached = get_cached_verdict(verdict_cache, row["text_column"], any_question, gpt_model, BATCH_PROMPT_VERSION)
+        if cached is None:
+            to_screen.append((index, row["text_column"]))
+        else:
+            results_by_index[index] = {"index": index, "title": titles[index], "relevant": "no" if cached == "yes" else "yes"}
+    batches = build_headline_batches(to_screen, gpt_model, token_budget)
+    logger.info("Packed %s headlines into %s batch requests", len(to_screen), len(batches))
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    tasks = [
+        screen_headline_batch_async(batch, titles, target_questions, run_on_full_text, gpt_client, gpt_model, semaphore, verdict_cache)
+        for batch in batches
+    ]
+    batch_results = await asyncio.gather(*tasks)
+    for batch_result in batch_results:
+        for result in batch_result:
+            results_by_index[result["index"]] = result
+    results = [results_by_index[index] for index in df.index]
+    return pd.DataFrame(results, columns=["index", "title", "relevant"])
+
+
+def query_gpt_for_relevance_batch(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, token_budget=DEFAULT_BATCH_TOKEN_BUDGET, verdict_cache=None):
+    """
+    Synchronous entry point for the packed multi-headline screening mode.
+    """
+    return run_with_async_client(
+        gpt_client,
+        lambda async_client: query_gpt_for_relevance_batch_async(
+            gpt_analyzer, df, target_questions, run_on_full_text, async_client, gpt_model, max_concurrency, token_budget, verdict_cache
+        ),
+    )
+
+
+def query_gpt_for_relevance_openai_batch(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None, batch_client=None, batch_name="screening"):
+    """
+    Screens every headline with the multi-question prompt as one Batch API job
+    (services.openai_batch). The first run submits the job and raises
+    BatchPending; a later run collects it. Headlines whose answers are all in
+    verdict_cache are not submitted; the prompt is the multi mode's, so both modes
+    share cache entries. Headlines the batch did not answer are screened
+    synchronously with the multi mode.
+
+    Returns:
+        pd.DataFrame: index/title/relevant/answers columns, like the multi mode.
+    """
+    batch_client = batch_client or OpenAIBatchClient(gpt_client)
+    answers_by_index = {}
+    fresh_by_index = {}
+    request_ids = {}
+    requests = {}
+    for index, row in df.iterrows():
+        headline = row["text_column"]
+        cached = {
+            question: get_cached_verdict(verdict_cache, headline, question, gpt_model, MULTI_QUESTION_PROMPT_VERSION)
+            for question in target_questions
+        }
+        if all(answer is not None for answer in cached.values()):
+            answers_by_index[index] = cached
+            continue
+        body = {
+            "model": gpt_model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": create_gpt_messages(build_multi_question_query(target_questions, headline), run_on_full_text),
+        }
+        request_ids[index] = batch_request_id(body)
+        requests[request_ids[index]] = body
+    results = run_chat_batch(batch_client, requests, batch_name)
+    unanswered = []
+    for index, request_id in request_ids.items():
+        content = results.get(request_id)
+        if content is None:
+            unanswered.append(index)
+            continue
+        parsed = parse_multi_question_answers(content, target_questions)
+        for question, answer in parsed.items():
+            store_verdict(verdict_cache, df.loc[index]["text_column"], question, gpt_model, MULTI_QUESTION_PROMPT_VERSION, answer)
+        fresh_by_index[index] = {question: answer for question, answer in parsed.items() if answer is not None}
+        answers_by_index[index] = {question: answer or "no" for question, answer in parsed.items()}
+    if unanswered:
+        logger.info("Screening %s headlines without a batch result synchronously", len(unanswered))
+        fallback_df = query_gpt_for_relevance_multi(
+            gpt_analyzer, df.loc[unanswered], target_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency, verdict_cache
+        )
+        for _, result in fallback_df.iterrows():
+            answers_by_index[result["index"]] = result["answers"]
+            fresh_by_index[result["index"]] = result["fresh_answers"]
+    rows = []
+    for index, row in df.iterrows():
+        answers = answers_by_index[index]
+        rows.append({
+            "index": index,
+            "title": row.get("title", "Unknown Title"),
+            "relevant": "no" if "yes" in answers.values() else "yes",
+            "answers": answers,
+            "fresh_answers": fresh_by_index.get(index, {}),
+        })
+    return pd.DataFrame(rows, columns=["index", "title", "relevant", "answers", "fresh_answers"])
+
+
+def lookup_cached_relevance(verdict_cache, headline, target_questions, gpt_model):
+    """
+    Reconstructs the screening outcome for a headline from cached answers of any
+    screening mode. Returns the "relevant" value ("yes"/"no"), or None when the
+    cache does not hold enough answers to decide. The probes use peek_verdict,
+    so they do not show up in the cache's hit/miss stats.
+    """
+    if verdict_cache is None or not target_questions:
+        return None
+    batch_verdict = verdict_cache.peek_verdict(headline, "\n".join(target_questions), gpt_model, BATCH_PROMPT_VERSION)
+    if batch_verdict is not None:
+        return "no" if batch_verdict == "yes" else "yes"
+    for prompt_version in (MULTI_QUESTION_PROMPT_VERSION, SINGLE_QUESTION_PROMPT_VERSION, LOGPROB_PROMPT_VERSION):
+        answers = [verdict_cache.peek_verdict(headline, question, gpt_model, prompt_version) for question in target_questions]
+        if "yes" in answers:
+            return "no"
+        if all(answer == "no" for answer in answers):
+            return "yes"
+    return None
+
+
+def apply_prefilter(df, prefilter, target_questions, gpt_model, verdict_cache=None):
+    """
+    Splits df into headlines the local pre-filter rejects and headlines left for GPT.
+    Rejects in the pre-filter's audit sample stay with GPT, so its false positives remain measurable.
+    When a verdict_cache is given, the pre-filter is scored against the cached GPT verdicts.
+
+    Returns:
+        tuple: (rejected_df with index/title/relevant/screened_by columns,
+        DataFrame of headlines to screen, {index: reject term} for the audited rejects)
+    """
+    reasons = prefilter.reject_reasons(df["text_column"])
+    rejected_mask = [reason is not None for reason in reasons]
+    if verdict_cache is not None:
+        gpt_relevance = [lookup_cached_relevance(verdict_cache, headline, target_questions, gpt_model) for headline in df["text_column"]]
+        logger.info("Pre-filter vs cached GPT verdicts: %s", evaluate_prefilter(rejected_mask, gpt_relevance))
+    audited = {
+        index: reason
+        for index, headline, reason in zip(df.index, df["text_column"], reasons)
+        if reason is not None and prefilter.is_audited(headline)
+    }
+    rejected_df = pd.DataFrame(
+        [
+            {"index": index, "title": row.get("title", "Unknown Title"), "relevant": "no", "screened_by": f"prefilter: {reason}"}
+            for (index, row), reason in zip(df.iterrows(), reasons)
+            if reason is not None and index not in audited
+        ],
+        columns=["index", "title", "relevant", "screened_by"],
+    )
+    logger.info("Pre-filter rejected %s of %s headlines; %s more rejects sent to GPT for audit", len(rejected_df), len(df), len(audited))
+    keep_mask = [not rejected or index in audited for index, rejected in zip(df.index, rejected_mask)]
+    return rejected_df, df[keep_mask], audited
+
+
+def apply_dedup(df, threshold=DEFAULT_DEDUP_THRESHOLD):
+    """
+    Clusters near-duplicate headlines (utils.dedup) and keeps one representative per cluster.
+
+    Returns:
+        tuple: (DataFrame of representatives, {df index: representative's df index})
+    """
+    index_list = list(df.index)
+    representatives = cluster_near_duplicates(list(df["text_column"]), threshold)
+    cluster_of = {index: index_list[rep] for index, rep in zip(index_list, representatives)}
+    representatives_df = df[[cluster_of[index] == index for index in index_list]]
+    logger.info("Dedup: %s clusters from %s headlines", len(representatives_df), len(df))
+    return representatives_df, cluster_of
+
+
+def expand_cluster_verdicts(relevance_df, df, cluster_of):
+    """
+    Copies each representative's screening result to the other members of its
+    cluster and records cluster_id (the representative's index) and representative columns.
+    """
+    by_index = {result["index"]: result for result in relevance_df.to_dict("records")}
+    results = []
+    for index, row in df.iterrows():
+        result = dict(by_index[cluster_of[index]])
+        result.update({
+            "index": index,
+            "title": row.get("title", "Unknown Title"),
+            "cluster_id": cluster_of[index],
+            "representative": cluster_of[index] == index,
+        })
+        results.append(result)
+    return pd.DataFrame(results, columns=list(relevance_df.columns) + ["cluster_id", "representative"])
+
+
+def question_costs(questions, gpt_model, headline_tokens=0):
+    """
+    Estimates the prompt tokens of asking each question about a headline of headline_tokens tokens.
+    """
+    encoder = get_token_encoder(gpt_model)
+    return {
+        question: len(encoder.encode(build_relevance_query(question, ""))) + headline_tokens
+        for question in questions
+    }
+
+
+def order_questions(df, target_questions, gpt_model, question_stats):
+    """
+    Reorders target_questions so the cheapest expected rejection comes first:
+    historical fire rate from question_stats weighed against prompt length.
+    """
+    if len(target_questions) < 2 or df.empty:
+        return list(target_questions)
+    encoder = get_token_encoder(gpt_model)
+    headline_tokens = sum(len(encoder.encode(str(text))) for text in df["text_column"]) // len(df)
+    fire_rates = question_stats.fire_rates(target_questions)
+    ordered = rank_questions(target_questions, fire_rates, question_costs(target_questions, gpt_model, headline_tokens))
+    logger.info(
+        "Question order for %s: %s",
+        question_stats.folder,
+        [(target_questions.index(question), round(fire_rates[question], 3)) for question in ordered],
+    )
+    return ordered
+
+
+def screen_headlines(gpt_analyzer, df, target_questions, run_on_full_text, gpt_client, gpt_model, mode=DEFAULT_SCREENING_MODE, max_concurrency=DEFAULT_MAX_CONCURRENCY, verdict_cache=None, prefilter=None, dedup_threshold=None, question_stats=None, question_order=DEFAULT_QUESTION_ORDER, batch_client=None, batch_name="screening", escalation_threshold=DEFAULT_ESCALATION_THRESHOLD, escalation_model=None):
+    """
+    Runs the relevance screening pass with the selected mode (see SCREENING_MODES).
+    Verdicts are read from and written to verdict_cache when one is given.
+    With a prefilter (utils.prefilter.HeadlinePrefilter), obvious rejects are
+    marked irrelevant locally and only the remaining headlines go to GPT, apart
+    from the pre-filter's audit sample of rejects, which GPT screens as usual.
+    With a dedup_threshold, near-duplicate headlines are clustered and only one
+    per cluster is screened; the others copy its verdict.
+    With question_stats (utils.question_stats.QuestionStats), the answers GPT
+    gave in this run are recorded (cached answers are not counted again), along
+    with the questions an early stop skipped, and the iterative modes ask
+    questions in adaptive order unless question_order is "fixed".
+    The "openai_batch" mode submits the screening as a Batch API job named
+    batch_name through batch_client (an OpenAIBatchClient for gpt_client by
+    default) and raises services.openai_batch.BatchPending until a later call
+    finds the job finished.
+    The "logprob" mode escalates answers with confidence below escalation_threshold
+    to a free-text second opinion from escalation_model.
+    """
+    if mode not in SCREENING_MODES:
+        raise ValueError(f"Unknown screening mode '{mode}'. Expected one of {SCREENING_MODES}.")
+    if question_order not in QUESTION_ORDERS:
+        raise ValueError(f"Unknown question order '{question_order}'. Expected one of {QUESTION_ORDERS}.")
+    rejected_df = None
+    audited = {}
+    positions = {index: position for position, index in enumerate(df.index)}
+    if prefilter is not None and not df.empty:
+        rejected_df, df, audited = apply_prefilter(df, prefilter, target_questions, gpt_model, verdict_cache)
+    screen_df, cluster_of = df, None
+    if dedup_threshold and not df.empty:
+        screen_df, cluster_of = apply_dedup(df, dedup_threshold)
+    logger.info("Screening %s headlines with mode '%s'", len(screen_df), mode)
+    if mode == "multi":
+        screen = query_gpt_for_relevance_multi
+    elif mode == "batch":
+        screen = query_gpt_for_relevance_batch
+    elif mode == "openai_batch":
+        screen = functools.partial(query_gpt_for_relevance_openai_batch, batch_client=batch_client, batch_name=batch_name)
+    elif mode == "logprob":
+        screen = functools.partial(
+            query_gpt_for_relevance_logprob, escalation_threshold=escalation_threshold, escalation_model=escalation_model
+        )
+    else:
+        screen = query_gpt_for_relevance_concurrent
+    screen_questions = target_questions
+    if mode in ("iterative", "logprob") and question_stats is not None and question_order == "adaptive":
+        # Only the iterative modes stop early; the other modes ask every question at once.
+        screen_questions = order_questions(screen_df, target_questions, gpt_model, question_stats)
+    relevance_df = screen(
+        gpt_analyzer, screen_df, screen_questions, run_on_full_text, gpt_client, gpt_model, max_concurrency, verdict_cache=verdict_cache
+    )
+    if verdict_cache is not None:
+        logger.info("Verdict cache: %s", verdict_cache.stats())
+    if question_stats is not None and "fresh_answers" in relevance_df.columns:
+        question_stats.record(
+            relevance_df["fresh_answers"], relevance_df["skipped"] if "skipped" in relevance_df.columns else None
+        )
+    if cluster_of is not None:
+        relevance_df = expand_cluster_verdicts(relevance_df, df, cluster_of)
+    if rejected_df is not None:
+        relevance_df = relevance_df.assign(screened_by="gpt")
+        if audited:
+            audit_mask = relevance_df["index"].isin(list(audited))
+            # Every audited headline was rejected, so precision is the share GPT also calls irrelevant.
+            logger.info(
+                "Pre-filter audit vs GPT: %s",
+                evaluate_prefilter([True] * int(audit_mask.sum()), list(relevance_df.loc[audit_mask, "relevant"])),
+            )
+            relevance_df.loc[audit_mask, "screened_by"] = [
+                f"gpt (prefilter audit: {audited[index]})" for index in relevance_df.loc[audit_mask, "index"]
+            ]
+        if cluster_of is not None:
+            # Pre-filter rejects are not clustered; each is its own cluster.
+            rejected_df = rejected_df.assign(cluster_id=rejected_df["index"], representative=True)
+        relevance_df = pd.concat([relevance_df, rejected_df], ignore_index=True)
+        # Restore the feed order so the output lists articles as before.
+        relevance_df = relevance_df.sort_values("index", key=lambda column: column.map(positions), ignore_index=True)
+    return relevance_df
+
 import json
 from site_text.questions import PROJECT_STATUS
 
@@ -157,7 +1031,8 @@ def query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tec
     ]
     
     try:
-        response_core = gpt_client.chat.completions.create(
+        response_core = chat_completion(
+            gpt_client,
             model=gpt_model,
             temperature=0,
             messages=msgs_core,
@@ -169,7 +1044,7 @@ def query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tec
             output_core = output_core[:-3].strip()
         core_details = json.loads(output_core)
     except Exception as e:
-        logger.info(f"Error extracting core project details: {e}")
+        logger.warning(f"Error extracting core project details: {e}")
         core_details = {}
     
     # Ensure that all core keys are present.
@@ -200,7 +1075,8 @@ def query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tec
         ]
         
         try:
-            response_additional = gpt_client.chat.completions.create(
+            response_additional = chat_completion(
+                gpt_client,
                 model=gpt_model,
                 temperature=0,
                 messages=msgs_additional,
@@ -212,7 +1088,7 @@ def query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tec
                 output_additional = output_additional[:-3].strip()
             additional_details = json.loads(output_additional)
         except Exception as e:
-            logger.info(f"Error extracting additional project details: {e}")
+            logger.warning(f"Error extracting additional project details: {e}")
             additional_details = {}
         
         for key in ['company', 'partners', 'continent', 'country', 'project_status']:
@@ -230,3 +1106,149 @@ def query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tec
     
     combined_details = {**core_details, **additional_details}
     return combined_details
+
+
+CORE_DETAIL_KEYS = ['scale', 'project_name', 'timeline', 'technology']
+ADDITIONAL_DETAIL_KEYS = ['company', 'projects mentioned', 'partners', 'continent', 'country', 'project_status']
+# "two_round": core details first, then a second call for additional details if any core detail was found.
+# "single_pass": one JSON-mode call returning core and additional details together.
+# "openai_batch" only applies to extract_project_details_many, which needs all articles at once.
+DETAIL_EXTRACTION_MODES = ["two_round", "single_pass", "openai_batch"]
+DEFAULT_DETAIL_EXTRACTION_MODE = "single_pass"
+
+def query_gpt_for_project_details_single_pass(gpt_client, gpt_model, article_text, steel_tech_list):
+    """
+    Extracts the same fields as query_gpt_for_project_details with a single
+    JSON-mode call, so the article text is sent once instead of twice.
+
+    The two-round behaviour is reproduced afterwards: additional details are
+    only kept if a core detail was found, and so is the "irrelevant" flag.
+
+    Returns a dictionary with all keys. Missing details are returned as empty strings.
+    """
+    logger.info("Inside single-pass detail module")
+    msgs = build_project_details_messages(article_text, steel_tech_list)
+    try:
+        response = chat_completion(
+            gpt_client,
+            model=gpt_model,
+            temperature=0,
+            response_format={"type": "json_object"},
+            messages=msgs,
+        )
+        return parse_project_details_response(response.choices[0].message.content)
+    except Exception as e:
+        logger.warning(f"Error extracting project details: {e}")
+        return split_project_details({})
+
+def build_project_details_messages(article_text, steel_tech_list):
+    """
+    Returns the chat messages of the single-pass detail extraction prompt.
+    """
+    tech_list_str = ", ".join(steel_tech_list)
+    prompt = (
+        "You are an information extraction assistant. Given the article text below, extract the following details if available. You may need to infer them:\n"
+        "- scale: one of 'pilot', 'demonstration', or 'full scale'\n"
+        "- project_name: the name of the project mentioned\n"
+        "- timeline: the year when it will be operative. If not explicitly stated, skip.\n"
+        f"- technology: one of the following: {tech_list_str}\n"
+        "- company: the name of the company leading the project\n"
+        "- projects mentioned: how many projects are mentioned in this article? (Multiple or one main one)\n"
+        "- partners: the names of partner companies or organizations\n"
+        "- continent: the continent where the project is located\n"
+        "- country: the country where the project is located\n"
+        f"- project_status: the current status of the project, one of the following: {', '.join(PROJECT_STATUS)}\n\n"
+        "IMPORTANT: If the article text is not related to cement production at all or it is about a FINISHED product, return empty values for "
+        "'company', 'projects mentioned', 'partners', 'continent', 'country' and 'project_status', and include a key \"irrelevant\" with value true.\n\n"
+        "Return your answer as a JSON object with keys exactly: 'scale', 'project_name', 'timeline', 'technology', 'company', "
+        "'projects mentioned', 'partners', 'continent', 'country', 'project_status', and optionally 'irrelevant'. "
+        "If a detail is not available, leave its value as an empty string.\n\n"
+        "Article text:\n\"\"\"\n" + article_text + "\n\"\"\""
+    )
+    return [
+        {"role": "system", "content": "You are an assistant that extracts project details from text."},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_project_details_response(content):
+    """
+    Parses a single-pass JSON response into the split details dict; unparseable responses give empty details.
+    """
+    try:
+        details = json.loads(strip_json_fences(content or ""))
+    except ValueError:
+        logger.warning("Could not parse project details response: %s", content)
+        details = {}
+    if not isinstance(details, dict):
+        details = {}
+    return split_project_details(details)
+
+def split_project_details(details):
+    """
+    Applies the two-round rules to a combined details dict: every key is present,
+    and additional details (including "irrelevant") are blanked unless a core detail was found.
+    """
+    core_details = {key: details.get(key, "") for key in CORE_DETAIL_KEYS}
+    if any(core_details[key] for key in CORE_DETAIL_KEYS):
+        additional_details = {key: details.get(key, "") for key in ADDITIONAL_DETAIL_KEYS}
+        if details.get("irrelevant"):
+            additional_details["irrelevant"] = True
+    else:
+        additional_details = {key: "" for key in ADDITIONAL_DETAIL_KEYS}
+    return {**core_details, **additional_details}
+
+def extract_project_details(gpt_client, gpt_model, article_text, steel_tech_list, mode=DEFAULT_DETAIL_EXTRACTION_MODE):
+    """
+    Runs project detail extraction with the selected mode (see DETAIL_EXTRACTION_MODES).
+    """
+    if mode not in DETAIL_EXTRACTION_MODES:
+        raise ValueError(f"Unknown detail extraction mode '{mode}'. Expected one of {DETAIL_EXTRACTION_MODES}.")
+    if mode == "two_round":
+        return query_gpt_for_project_details(gpt_client, gpt_model, article_text, steel_tech_list)
+    # A single article is not worth a batch job; "openai_batch" falls back to the same single-pass prompt.
+    return query_gpt_for_project_details_single_pass(gpt_client, gpt_model, article_text, steel_tech_list)
+
+def extract_project_details_batch(batch_client, gpt_client, gpt_model, article_texts, steel_tech_list, batch_name="details"):
+    """
+    Runs single-pass detail extraction for {key: article_text} as one Batch API
+    job. The first run submits the job and raises BatchPending; a later run
+    collects it. Articles the batch did not answer are extracted synchronously.
+
+    Returns:
+        dict: key -> details dict, as extract_project_details would return it.
+    """
+    request_ids = {}
+    requests = {}
+    for key, article_text in article_texts.items():
+        body = {
+            "model": gpt_model,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": build_project_details_messages(article_text, steel_tech_list),
+        }
+        request_ids[key] = batch_request_id(body)
+        requests[request_ids[key]] = body
+    results = run_chat_batch(batch_client, requests, batch_name)
+    details = {}
+    for key, request_id in request_ids.items():
+        content = results.get(request_id)
+        if content is None:
+            details[key] = query_gpt_for_project_details_single_pass(gpt_client, gpt_model, article_texts[key], steel_tech_list)
+        else:
+            details[key] = parse_project_details_response(content)
+    return details
+
+def extract_project_details_many(gpt_client, gpt_model, article_texts, steel_tech_list, mode=DEFAULT_DETAIL_EXTRACTION_MODE, batch_client=None, batch_name="details"):
+    """
+    Extracts details for {key: article_text}. The "openai_batch" mode sends every
+    article in one Batch API job named batch_name (see extract_project_details_batch);
+    the other modes make one call per article.
+    """
+    if mode == "openai_batch":
+        return extract_project_details_batch(
+            batch_client or OpenAIBatchClient(gpt_client), gpt_client, gpt_model, article_texts, steel_tech_list, batch_name
+        )
+    return {
+        key: extract_project_details(gpt_client, gpt_model, article_text, steel_tech_list, mode=mode)
+        for key, article_text in article_texts.items()
+    }
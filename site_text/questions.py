@@ -115,4 +115,52 @@ STEEL_IRON_TECH = ["H-DRI (hydrogen direct reduced iron or sponge iron)", "CCS f
 "NG-DRI to H-DRI + EAF", "EAF using imported NG-DRI", "NG-DRI to H-DRI + ESF", "NG-DRI", "Biogenic syngas DRI", "NG-DRI + EAF",
 "Electrochemical process", "NG-DRI + CCS", "H2 injection to BF", "Green hydrogen", "SOEC (solid oxide electrolysis cell)", "biochar use", "CCS (carbon capture storage)", "briquetted iron"]
 CEMENT_TECH = ["CCS (carbon capture storage)", "CCUS (carbon capture and utilization storage)", "Meca clay", "Kiln for calcined clay"]
-PROJECT_STATUS = ["Announced", "Cancelled", "Construction", "Operating", "Finalized (research & testing)", "Paused/postponed"]
\ No newline at end of file
+PROJECT_STATUS = ["Announced", "Cancelled", "Construction", "Operating", "Finalized (research & testing)", "Paused/postponed"]
+# Fields extracted from relevant articles, in the format of process_table().
+# Used to pick the excerpts of long articles sent for detail extraction.
+DETAIL_FIELD_SPECS = {
+    "scale": {"variable_description": "The scale of the project: pilot, demonstration, or full scale plant", "context": ""},
+    "project_name": {"variable_description": "The name of the project", "context": ""},
+    "timeline": {"variable_description": "The year when the project or plant will start operating", "context": ""},
+    "technology": {"variable_description": "The production technology used, such as hydrogen DRI, electric arc furnace, carbon capture, or calcined clay", "context": ""},
+    "company": {"variable_description": "The company leading the project", "context": ""},
+    "partners": {"variable_description": "Partner companies or organizations involved in the project", "context": ""},
+    "location": {"variable_description": "The country, region, or city where the project or plant is located", "context": ""},
+    "project_status": {"variable_description": "The status of the project: announced, cancelled, under construction, operating, finalized, or paused", "context": ""},
+}
+
+# Local pre-filter: regex fragments (matched case-insensitively on word boundaries)
+# that mark a headline as an obvious reject before any GPT call. A headline that
+# also matches a KEEP term is always passed on to GPT.
+STEEL_REJECT_TERMS = [
+    r"conferences?", r"summit", r"forum", r"webinar", r"expo", r"exhibition", r"trade fair",
+    r"dividends?", r"share prices?", r"stock (?:market|price)s?", r"stocks?", r"shares (?:rise|fall|jump|drop|slip|gain)\w*",
+    r"net profit", r"profits?", r"earnings", r"quarterly results", r"q[1-4] results", r"fiscal year", r"fy ?\d{2,4}",
+    r"tariffs?", r"anti-dumping", r"import duty", r"import duties", r"safeguard duty",
+    r"football", r"soccer", r"cricket", r"basketball", r"nba", r"nfl", r"olympics?", r"fashion", r"wristwatch", r"movie", r"recipe",
+    r"layoffs?", r"price index", r"prices? (?:rise|fall|drop|surge|slump)\w*",
+]
+IRON_REJECT_TERMS = STEEL_REJECT_TERMS + [r"iron ore prices?", r"coal prices?"]
+CEMENT_REJECT_TERMS = [
+    r"conferences?", r"summit", r"forum", r"webinar", r"expo", r"exhibition", r"trade fair",
+    r"dividends?", r"share prices?", r"stock (?:market|price)s?", r"stocks?", r"bonds?",
+    r"net profit", r"profits?", r"earnings", r"quarterly results", r"q[1-4] results", r"fiscal year", r"fy ?\d{2,4}",
+    r"operating margins?", r"dispatch(?:es)?", r"tariffs?", r"anti-dumping", r"import duty",
+    r"football", r"soccer", r"cricket", r"basketball", r"olympics?", r"fashion", r"movie", r"recipe",
+]
+STEEL_IRON_KEEP_TERMS = [
+    r"green (?:steel|iron|hydrogen)", r"hydrogen", r"h2", r"dri", r"direct(?:ly)? reduc\w*", r"hbi", r"briquett\w*",
+    r"electric arc furnaces?", r"eaf", r"electric smelting", r"carbon capture", r"ccu?s", r"biochar", r"biomass",
+    r"decarboni[sz]\w*", r"low[- ]carbon", r"low[- ]emissions?", r"fossil[- ]free", r"electroly\w*",
+    r"pilot", r"demonstration plant", r"mou", r"memorandum of understanding", r"final investment decision", r"fid", r"grants?",
+]
+CEMENT_KEEP_TERMS = [
+    r"green cement", r"low[- ]carbon", r"carbon capture", r"ccu?s", r"calcined clay", r"clay", r"kiln",
+    r"decarboni[sz]\w*", r"alternative fuels?", r"hydrogen", r"electrif\w*", r"co2", r"carbon",
+    r"pilot", r"demonstration plant", r"mou", r"memorandum of understanding", r"final investment decision", r"grants?",
+]
+PREFILTER_TERMS = {
+    "LeadIT-Steel": (STEEL_REJECT_TERMS, STEEL_IRON_KEEP_TERMS),
+    "LeadIT-Iron": (IRON_REJECT_TERMS, STEEL_IRON_KEEP_TERMS),
+    "LeadIT-Cement": (CEMENT_REJECT_TERMS, CEMENT_KEEP_TERMS),
+}
@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+
+from utils.dedup import cluster_near_duplicates, jaccard, minhash_signatures, normalize_for_dedup, shingles
+
+
+def test_minhash_estimate_matches_exact_jaccard():
+    rng = random.Random(0)
+    words = "steel green hydrogen plant build cancels project Duisburg Tata Nucor record profit output supply pilot".split()
+    errors = []
+    for _ in range(300):
+        a = shingles(" ".join(rng.sample(words, 6)))
+        b = shingles(" ".join(rng.sample(words, 6)))
+        signatures = minhash_signatures([a, b], num_perm=64, seed=rng.randint(0, 10000))
+        errors.append(np.mean(signatures[0] == signatures[1]) - jaccard(a, b))
+    # Unbiased, with about the 1 / sqrt(64) spread expected for 64 permutations.
+    assert abs(np.mean(errors)) < 0.02
+    assert np.std(errors) < 0.08
+
+
+def test_minhash_estimate_converges_for_a_close_pair():
+    a = shingles(normalize_for_dedup("Thyssenkrupp cancels green steel project in Duisburg"))
+    b = shingles(normalize_for_dedup("Thyssenkrupp advances green steel project in Duisburg"))
+    signatures = minhash_signatures([a, b], num_perm=4096)
+    assert abs(np.mean(signatures[0] == signatures[1]) - jaccard(a, b)) < 0.03
+
+
+def test_syndicated_copies_cluster_and_different_stories_do_not():
+    texts = [
+        "H2 Green Steel to build plant in Boden - Reuters",
+        "Nucor reports record Q2 profit",
+        "H2 Green Steel to build plant in Boden",
+        "Nucor reports record Q2 steel output",
+        "Thyssenkrupp cancels green steel project in Duisburg",
+        "Thyssenkrupp advances green steel project in Duisburg",
+        "Tata Steel signs MoU for hydrogen DRI pilot",
+        "Tata Steel signs MoU for hydrogen supply",
+    ]
+    assert cluster_near_duplicates(texts) == [0, 1, 0, 3, 4, 5, 6, 7]
+
+
+def test_members_are_compared_with_the_representative_not_chained():
+    # Each headline is close to the previous one, but the last is far from the first.
+    texts = [
+        "ArcelorMittal to build DRI plant in Gijon",
+        "ArcelorMittal to build DRI plant in Gijon Spain",
+        "ArcelorMittal to build new DRI plant in Gijon Spain",
+        "ArcelorMittal plans to build new DRI plant in Gijon Spain",
+    ]
+    representatives = cluster_near_duplicates(texts, threshold=0.75)
+    for i, representative in enumerate(representatives):
+        a = shingles(normalize_for_dedup(texts[i]))
+        b = shingles(normalize_for_dedup(texts[representative]))
+        assert jaccard(a, b) >= 0.75
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from services.openai_batch import BatchPending, LocalBatchClient, batch_request_id, run_chat_batch
+
+
+def chat_body(text):
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": text}]}
+
+
+def test_batch_is_submitted_then_collected_on_a_later_run(tmp_path):
+    seen = []
+
+    def respond(body):
+        seen.append(body)
+        return body["messages"][0]["content"].upper()
+
+    client = LocalBatchClient(str(tmp_path / "api"), respond)
+    work_dir = str(tmp_path / "work")
+    requests = {batch_request_id(chat_body(text)): chat_body(text) for text in ["steel plant", "cement kiln"]}
+
+    with pytest.raises(BatchPending) as pending:
+        run_chat_batch(client, requests, "screening", work_dir)
+    assert pending.value.name == "screening"
+    assert len(pending.value.batch_ids) == 1
+    # Submitting does not wait for answers.
+    assert seen == []
+
+    results = run_chat_batch(client, requests, "screening", work_dir)
+    assert results == {batch_request_id(chat_body("steel plant")): "STEEL PLANT",
+                       batch_request_id(chat_body("cement kiln")): "CEMENT KILN"}
+    # The job's state is cleared, so the next run submits a new batch.
+    assert os.listdir(work_dir) == []
+
+
+def test_requests_without_a_batch_answer_come_back_as_none(tmp_path):
+    client = LocalBatchClient(
+        str(tmp_path / "api"), lambda body: None if "unparseable" in body["messages"][0]["content"] else "no"
+    )
+    work_dir = str(tmp_path / "work")
+    submitted = {batch_request_id(chat_body(text)): chat_body(text) for text in ["steel plant", "unparseable"]}
+    with pytest.raises(BatchPending):
+        run_chat_batch(client, submitted, "details", work_dir)
+
+    # A request added after submission was never part of the batch.
+    requests = dict(submitted, **{batch_request_id(chat_body("new headline")): chat_body("new headline")})
+    results = run_chat_batch(client, requests, "details", work_dir)
+    assert results[batch_request_id(chat_body("steel plant"))] == "no"
+    assert results[batch_request_id(chat_body("unparseable"))] is None
+    assert results[batch_request_id(chat_body("new headline"))] is None
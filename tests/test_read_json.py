@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from utils.read_json import iter_json_feed_items, parse_json_feed
+
+FEED = {
+    "v": 1.5,
+    "version": "https://jsonfeed.org/version/1",
+    "count": 12e3,
+    "ratio": -0.25E-2,
+    "items": [
+        {"id": "1", "title": "SSAB pilot plant", "url": "https://a", "tags": ["steel"], "score": 10.75},
+        {"id": "2", "title": "Kraków – Zement", "url": "https://b", "tags": [], "score": 3},
+        {"id": "3", "title": "Last", "url": "https://c", "flag": True, "missing": None},
+    ],
+    "next": 7,
+}
+
+
+@pytest.fixture
+def feed_path(tmp_path):
+    path = tmp_path / "feed.json"
+    path.write_text(json.dumps(FEED, indent=1, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 2, 3, 4, 5, 7, 8, 16, 64, 1 << 20])
+def test_items_decode_identically_for_every_chunk_size(feed_path, chunk_chars):
+    assert list(iter_json_feed_items(feed_path, chunk_chars)) == FEED["items"]
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 2, 4, 8])
+def test_parse_json_feed_with_small_chunks(feed_path, chunk_chars):
+    df = parse_json_feed(feed_path, chunk_chars=chunk_chars)
+    assert list(df["id"]) == ["1", "2", "3"]
+    assert list(df["tags"]) == ["steel", "", "Unknown"]
@@ -0,0 +1,65 @@
+"""
+On-disk cache of extracted article text keyed by resolved URL. Articles stay in
+Inoreader's rolling 7-day window for several runs; this cache keeps the parsed
+text together with the ETag/Last-Modified validators so reruns can revalidate
+with a conditional GET instead of downloading and parsing again.
+"""
+
+import os
+import time
+from utils.sqlite_cache import SQLiteCache
+
+DEFAULT_ARTICLE_CACHE_PATH = os.path.join("cache", "articles.sqlite")
+DEFAULT_ARTICLE_MAX_AGE_DAYS = 14
+DEFAULT_ARTICLE_MAX_ENTRIES = 20000
+# Within this window a cached article is reused without contacting the server at all.
+DEFAULT_ARTICLE_FRESH_HOURS = 12
+
+
+class ArticleCache(SQLiteCache):
+    """
+    Maps a resolved article URL to its text, fetch time, ETag and Last-Modified.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_ARTICLE_CACHE_PATH,
+        max_age_days=DEFAULT_ARTICLE_MAX_AGE_DAYS,
+        max_entries=DEFAULT_ARTICLE_MAX_ENTRIES,
+        fresh_hours=DEFAULT_ARTICLE_FRESH_HOURS,
+    ):
+        max_age_seconds = max_age_days * 24 * 60 * 60 if max_age_days is not None else None
+        self.fresh_seconds = fresh_hours * 60 * 60
+        super().__init__(db_path, max_age_seconds=max_age_seconds, max_entries=max_entries)
+
+    def lookup(self, url):
+        """
+        Returns the cached entry for url as a dict with keys text, fetched_at,
+        etag and last_modified, or None on a miss.
+        """
+        return self.get(url)
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.fresh_seconds
+
+    def store(self, url, text, etag=None, last_modified=None):
+        self.set(url, {
+            "text": text,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+        })
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Returns the If-None-Match / If-Modified-Since headers for revalidating entry.
+        """
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -0,0 +1,127 @@
+"""
+Near-duplicate headline clustering with MinHash and locality-sensitive hashing.
+Syndicated copies of one announcement ("X to build green steel plant" /
+"X plans green-steel plant - Reuters") land in the same cluster, so only one
+representative per cluster needs to be screened.
+
+Headlines are short, so two reports that differ only in a place or partner name
+can also cluster together. Only the screening verdict is shared: every member
+still goes through URL resolution and detail extraction on its own.
+"""
+
+import re
+import zlib
+import numpy as np
+
+# Headlines that differ only in "cancels"/"advances" or "profit"/"output" still
+# score 0.5-0.7 on character shingles; 0.8 keeps to copies that differ in
+# punctuation, a source name or a small word.
+DEFAULT_DEDUP_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+SHINGLE_SIZE = 4
+# Mersenne prime for the MinHash permutations (a * x + b) mod p. With a, b and
+# x all below 2**31 the product stays below 2**63, so the uint64 arithmetic
+# never overflows, and a and b are drawn from the whole of [1, p).
+_PRIME = (1 << 31) - 1
+
+# Trailing " - Reuters" / " | Bloomberg" style source attributions.
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,60}$")
+
+
+def normalize_for_dedup(text):
+    """
+    Lowercases, drops a trailing source attribution and reduces punctuation to spaces.
+    """
+    text = _SOURCE_SUFFIX.sub("", str(text or "").strip()).lower()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Returns the set of character shingles of a normalized text.
+    """
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    """
+    Exact Jaccard similarity of two shingle sets.
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def shingle_hashes(shingle_set):
+    """
+    Returns the shingles hashed into [0, _PRIME).
+    """
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingle_set), dtype=np.uint64, count=len(shingle_set)
+    )
+
+
+def minhash_signatures(shingle_sets, num_perm=DEFAULT_NUM_PERM, seed=1):
+    """
+    Returns an (len(shingle_sets), num_perm) array of MinHash signatures. The
+    share of equal positions in two signatures estimates their Jaccard similarity.
+    """
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+    b = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+    for i, shingle_set in enumerate(shingle_sets):
+        hashes = shingle_hashes(shingle_set)
+        signatures[i] = ((np.outer(hashes, a) + b) % _PRIME).min(axis=0)
+    return signatures
+
+
+def cluster_near_duplicates(texts, threshold=DEFAULT_DEDUP_THRESHOLD, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS):
+    """
+    Groups texts whose Jaccard similarity to their cluster's representative is at least threshold.
+
+    Candidates come from LSH buckets (bands of num_perm // bands rows), so only
+    likely matches are compared, and each one is confirmed with the exact shingle
+    Jaccard against the representative. Texts are assigned in input order and
+    never through another member, so a chain of small rewordings cannot join two
+    dissimilar headlines.
+
+    Returns:
+        list of int: For each text, the position of its cluster's representative
+        (the first member in input order). A text that is its own representative
+        has no near duplicate earlier in the list.
+    """
+    normalized = [normalize_for_dedup(text) for text in texts]
+    representative = list(range(len(texts)))
+    if len(texts) < 2:
+        return representative
+
+    shingle_sets = [shingles(text) for text in normalized]
+    signatures = minhash_signatures(shingle_sets, num_perm)
+    rows = num_perm // bands
+    band_keys = [
+        [bytes(signatures[i, band * rows:(band + 1) * rows]) for band in range(bands)] for i in range(len(texts))
+    ]
+
+    # Per band, the representatives already holding each bucket key.
+    buckets = [{} for _ in range(bands)]
+    for i in range(len(texts)):
+        candidates = set()
+        for band, key in enumerate(band_keys[i]):
+            candidates.update(buckets[band].get(key, ()))
+        # The most similar representative wins; ties go to the earlier one.
+        best, best_similarity = None, threshold
+        for candidate in sorted(candidates):
+            similarity = jaccard(shingle_sets[candidate], shingle_sets[i])
+            if similarity > best_similarity or (best is None and similarity == best_similarity):
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            representative[i] = best
+        # Every text's keys point at its representative, so later copies that
+        # share a band with any member are still compared with the representative.
+        for band, key in enumerate(band_keys[i]):
+            buckets[band].setdefault(key, set()).add(representative[i])
+    return representative
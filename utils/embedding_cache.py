@@ -0,0 +1,233 @@
+"""
+Content-addressed cache of embedding vectors.
+
+Each vector is keyed by a hash of the embeddings model name and the exact text,
+so identical chunks are embedded once no matter which document they came from.
+Vectors are stored as raw float32 rows in one binary file per model and read
+back through a memory map; a SQLite index maps each key to its row.
+
+Several processes (one per Streamlit session) may share a cache directory.
+Writers hold an exclusive SQLite transaction while they assign rows and write
+the binary file, and readers look up rows and read vectors inside one read
+transaction, so a reader never sees a row that is being rewritten.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+DEFAULT_EMBEDDING_CACHE_DIR = os.path.join("cache", "embeddings")
+DEFAULT_EMBEDDING_MAX_ENTRIES = 200000
+# Eviction trims the cache to this share of max_entries, so it runs once per
+# many inserts instead of on every insert once the cache is full.
+EVICTION_LOW_WATER = 0.9
+# Seconds to wait for another process's transaction before giving up.
+SQLITE_TIMEOUT_SECONDS = 30
+
+
+class EmbeddingCache:
+    """
+    Stores embeddings as float32 rows in <cache_dir>/<model>.f32 with a SQLite
+    index. When the index grows past max_entries, the least recently used
+    vectors are dropped down to EVICTION_LOW_WATER * max_entries; their rows go
+    on a free list and are overwritten by later inserts, so the binary file is
+    never rewritten and stays at most max_entries rows long.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_EMBEDDING_CACHE_DIR, max_entries=DEFAULT_EMBEDDING_MAX_ENTRIES):
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memmaps = {}
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), timeout=SQLITE_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, row INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, dim INTEGER NOT NULL, next_row INTEGER NOT NULL)"
+        )
+        if "next_row" not in [column[1] for column in self._conn.execute("PRAGMA table_info(models)").fetchall()]:
+            # Caches written before the free list derived the next row from the file size.
+            self._conn.execute("ALTER TABLE models ADD COLUMN next_row INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE models SET next_row = "
+                "(SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings WHERE embeddings.model = models.model)"
+            )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS free_rows (model TEXT NOT NULL, row INTEGER NOT NULL, PRIMARY KEY (model, row))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text, model):
+        return hashlib.sha256(f"{model}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts, model):
+        """
+        Returns a list with the cached float32 vector for each text, or None where it is not cached.
+        """
+        keys = [self.make_key(text, model) for text in texts]
+        results = [None] * len(texts)
+        with self._lock:
+            # Rows are looked up and read in one transaction, so no writer can reuse them in between.
+            self._conn.execute("BEGIN")
+            try:
+                rows = {}
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows.update(self._conn.execute(
+                        f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall())
+                vectors = self._vectors(model, max(rows.values()) + 1) if rows else None
+                for i, key in enumerate(keys):
+                    if key in rows and vectors is not None and rows[key] < len(vectors):
+                        results[i] = np.array(vectors[rows[key]])
+            finally:
+                self._conn.commit()
+            found = [key for key in keys if key in rows]
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(time.time(), key) for key in found]
+                )
+                self._conn.commit()
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        return results
+
+    def put_many(self, texts, embeddings, model):
+        """
+        Stores the vectors for texts that are not cached yet.
+        """
+        if not texts:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        with self._lock:
+            # Exclusive: waits for readers and other writers, so row numbers are assigned once.
+            self._conn.execute("BEGIN EXCLUSIVE")
+            try:
+                self._put_rows(texts, matrix, model)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        self.evict()
+
+    def evict(self):
+        """
+        Once more than max_entries vectors are stored, drops the least recently
+        used down to EVICTION_LOW_WATER * max_entries and frees their rows.
+        """
+        if self.max_entries is None:
+            return
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if total <= self.max_entries:
+                return
+            self._conn.execute("BEGIN EXCLUSIVE")
+            try:
+                self._conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS evicted (key TEXT PRIMARY KEY, model TEXT NOT NULL, row INTEGER NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM evicted")
+                self._conn.execute(
+                    "INSERT INTO evicted SELECT key, model, row FROM embeddings "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+                    (int(self.max_entries * EVICTION_LOW_WATER),),
+                )
+                self._conn.execute("INSERT OR IGNORE INTO free_rows (model, row) SELECT model, row FROM evicted")
+                self._conn.execute("DELETE FROM embeddings WHERE key IN (SELECT key FROM evicted)")
+                self._conn.execute("DELETE FROM evicted")
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def close(self):
+        with self._lock:
+            self._memmaps.clear()
+            self._conn.close()
+
+    def _put_rows(self, texts, matrix, model):
+        """
+        Writes the new vectors and their index rows; the caller holds an exclusive transaction.
+        """
+        dim = self._dim(model, matrix.shape[1])
+        new_rows = []
+        new_keys = set()
+        for text, vector in zip(texts, matrix):
+            key = self.make_key(text, model)
+            if key in new_keys or self._conn.execute(
+                "SELECT 1 FROM embeddings WHERE key = ?", (key,)
+            ).fetchone():
+                continue
+            new_keys.add(key)
+            new_rows.append((key, vector))
+        if not new_rows:
+            return
+        # Reuse freed rows first, then extend the file.
+        rows = [row for (row,) in self._conn.execute(
+            "SELECT row FROM free_rows WHERE model = ? ORDER BY row LIMIT ?", (model, len(new_rows))
+        ).fetchall()]
+        next_row = self._conn.execute("SELECT next_row FROM models WHERE model = ?", (model,)).fetchone()[0]
+        extra = len(new_rows) - len(rows)
+        rows.extend(range(next_row, next_row + extra))
+        path = self._vectors_path(model)
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+            for row, (_, vector) in zip(rows, new_rows):
+                f.seek(row * 4 * dim)
+                f.write(np.asarray(vector, dtype=np.float32).tobytes())
+        self._conn.executemany("DELETE FROM free_rows WHERE model = ? AND row = ?", [(model, row) for row in rows])
+        self._conn.execute("UPDATE models SET next_row = ? WHERE model = ?", (next_row + extra, model))
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO embeddings (key, model, row, last_used) VALUES (?, ?, ?, ?)",
+            [(key, model, row, now) for row, (key, _) in zip(rows, new_rows)],
+        )
+
+    def _vectors_path(self, model):
+        return os.path.join(self.cache_dir, re.sub(r"[^\w.-]", "_", model) + ".f32")
+
+    def _dim(self, model, dim):
+        row = self._conn.execute("SELECT dim FROM models WHERE model = ?", (model,)).fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO models (model, dim, next_row) VALUES (?, ?, 0)", (model, dim))
+            return dim
+        if row[0] != dim:
+            raise ValueError(f"Embedding size {dim} does not match cached size {row[0]} for model '{model}'.")
+        return row[0]
+
+    def _vectors(self, model, min_rows=0):
+        """
+        Returns a read-only memory map over the model's vectors, or None if nothing is stored.
+        The map is reopened when it is shorter than min_rows, since other processes may have
+        extended the file.
+        """
+        vectors = self._memmaps.get(model)
+        if vectors is not None and len(vectors) >= min_rows:
+            return vectors
+        row = self._conn.execute("SELECT dim FROM models WHERE model = ?", (model,)).fetchone()
+        path = self._vectors_path(model)
+        if row is None or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        dim = row[0]
+        vectors = np.memmap(path, dtype=np.float32, mode="r", shape=(os.path.getsize(path) // (4 * dim), dim))
+        self._memmaps[model] = vectors
+        return vectors
@@ -0,0 +1,109 @@
+"""
+Local keyword pre-filter that rejects obvious off-topic headlines (conferences,
+dividends, tariffs, sports, ...) before they reach GPT screening. Each folder's
+terms live in site_text.questions.PREFILTER_TERMS; all reject terms are compiled
+into a single regex so a headline is scanned once.
+
+A small, fixed sample of rejected headlines (audit_rate) is still sent to GPT,
+so the pre-filter's false positives stay measurable after the first run.
+"""
+
+import hashlib
+import re
+from site_text.questions import PREFILTER_TERMS
+
+# Share of pre-filter rejects screened by GPT anyway to audit the pre-filter.
+DEFAULT_AUDIT_RATE = 0.05
+
+
+def compile_terms(terms):
+    """
+    Compiles regex fragments into one case-insensitive alternation anchored on word boundaries.
+    """
+    if not terms:
+        return None
+    return re.compile(r"\b(?:" + "|".join(f"(?:{term})" for term in terms) + r")\b", re.IGNORECASE)
+
+
+class HeadlinePrefilter:
+    """
+    Rejects a headline when it matches a reject term and no keep term.
+    """
+
+    def __init__(self, reject_terms, keep_terms=(), audit_rate=DEFAULT_AUDIT_RATE):
+        self.reject_pattern = compile_terms(reject_terms)
+        self.keep_pattern = compile_terms(keep_terms)
+        self.audit_rate = audit_rate
+
+    def is_audited(self, headline):
+        """
+        True if a rejected headline falls in the audit sample. The choice hashes the
+        headline, so it is the same on every run and its GPT verdict stays cached.
+        """
+        digest = hashlib.sha256(str(headline or "").encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") < self.audit_rate * 2 ** 32
+
+    def reject_reason(self, headline):
+        """
+        Returns the reject term found in headline, or None if the headline should go to GPT.
+        """
+        if self.reject_pattern is None:
+            return None
+        text = str(headline or "")
+        match = self.reject_pattern.search(text)
+        if match is None:
+            return None
+        if self.keep_pattern is not None and self.keep_pattern.search(text):
+            return None
+        return match.group(0).lower()
+
+    def reject_reasons(self, headlines):
+        """
+        Returns a list with the reject term (or None) for each headline.
+        """
+        return [self.reject_reason(headline) for headline in headlines]
+
+
+def prefilter_for_folder(folder, audit_rate=DEFAULT_AUDIT_RATE):
+    """
+    Returns the HeadlinePrefilter for an Inoreader folder, or None when the folder has no terms.
+    """
+    if folder not in PREFILTER_TERMS:
+        return None
+    reject_terms, keep_terms = PREFILTER_TERMS[folder]
+    return HeadlinePrefilter(reject_terms, keep_terms, audit_rate)
+
+
+def evaluate_prefilter(rejected, gpt_relevance):
+    """
+    Scores pre-filter rejections against GPT verdicts, treating "GPT says
+    irrelevant" as the positive class. Headlines without a GPT verdict are skipped.
+
+    Args:
+        rejected (list of bool): Whether the pre-filter rejected each headline.
+        gpt_relevance (list): GPT's "relevant" value ("yes"/"no") per headline, or None when unknown.
+
+    Returns:
+        dict: evaluated, true_positives, false_positives, false_negatives, precision, recall.
+    """
+    true_positives = false_positives = false_negatives = evaluated = 0
+    for is_rejected, relevant in zip(rejected, gpt_relevance):
+        if relevant is None:
+            continue
+        evaluated += 1
+        if is_rejected and relevant == "no":
+            true_positives += 1
+        elif is_rejected:
+            false_positives += 1
+        elif relevant == "no":
+            false_negatives += 1
+    predicted = true_positives + false_positives
+    actual = true_positives + false_negatives
+    return {
+        "evaluated": evaluated,
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+        "precision": true_positives / predicted if predicted else None,
+        "recall": true_positives / actual if actual else None,
+    }
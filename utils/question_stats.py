@@ -0,0 +1,113 @@
+"""
+Per-folder record of how often each screening question fires ("yes" = reject).
+The iterative screener stops at the first "yes", so asking the likeliest
+rejecters first saves requests; these counts drive that ordering.
+Only answers GPT actually gave are counted, so cached answers replayed on a
+rerun do not count twice. Questions left unasked by an early stop are counted
+separately as skipped and do not enter the fire rate.
+"""
+
+import os
+import sqlite3
+import threading
+
+DEFAULT_QUESTION_STATS_PATH = os.path.join("cache", "question_stats.sqlite")
+# "adaptive": order questions by expected cost per rejection; "fixed": keep the list order.
+QUESTION_ORDERS = ["adaptive", "fixed"]
+DEFAULT_QUESTION_ORDER = "adaptive"
+
+
+def rank_questions(questions, fire_rates, costs):
+    """
+    Orders questions by cost / fire rate, ascending. For questions asked in
+    sequence until one fires, this ordering minimizes the expected cost per
+    headline when the questions fire independently. Ties keep the list order.
+    """
+    positions = {question: position for position, question in enumerate(questions)}
+    return sorted(
+        questions,
+        key=lambda question: (costs[question] / max(fire_rates[question], 1e-6), positions[question]),
+    )
+
+
+class QuestionStats:
+    """
+    Counts, per folder and question, how often the question was answered, how
+    often it fired, and how often an earlier question's "yes" skipped it.
+    """
+
+    def __init__(self, folder, db_path=DEFAULT_QUESTION_STATS_PATH):
+        stats_dir = os.path.dirname(db_path)
+        if stats_dir and not os.path.exists(stats_dir):
+            os.makedirs(stats_dir)
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_stats ("
+            "folder TEXT NOT NULL, question TEXT NOT NULL, asked INTEGER NOT NULL, fired INTEGER NOT NULL, "
+            "skipped INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (folder, question))"
+        )
+        if "skipped" not in [column[1] for column in self._conn.execute("PRAGMA table_info(question_stats)").fetchall()]:
+            self._conn.execute("ALTER TABLE question_stats ADD COLUMN skipped INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def fire_rates(self, questions):
+        """
+        Returns {question: smoothed fire rate}. (fired + 1) / (asked + 2) keeps
+        unseen questions at 0.5, so new questions are tried early.
+        """
+        with self._lock:
+            rows = {
+                question: (asked, fired)
+                for question, asked, fired in self._conn.execute(
+                    "SELECT question, asked, fired FROM question_stats WHERE folder = ?", (self.folder,)
+                ).fetchall()
+            }
+        rates = {}
+        for question in questions:
+            asked, fired = rows.get(question, (0, 0))
+            rates[question] = (fired + 1) / (asked + 2)
+        return rates
+
+    def counts(self):
+        """
+        Returns {question: (asked, fired, skipped)} for the folder.
+        """
+        with self._lock:
+            return {
+                question: (asked, fired, skipped)
+                for question, asked, fired, skipped in self._conn.execute(
+                    "SELECT question, asked, fired, skipped FROM question_stats WHERE folder = ?", (self.folder,)
+                ).fetchall()
+            }
+
+    def record(self, answers, skipped=None):
+        """
+        Adds screening outcomes, given as an iterable of {question: "yes"/"no"} dicts
+        (one per headline) holding only the answers GPT gave in this run. skipped is
+        an iterable of lists (one per headline) of the questions an early stop left unasked.
+        """
+        counts = {}
+        for headline_answers in answers:
+            for question, answer in (headline_answers or {}).items():
+                asked, fired, skips = counts.get(question, (0, 0, 0))
+                counts[question] = (asked + 1, fired + (answer == "yes"), skips)
+        for headline_skipped in (skipped if skipped is not None else []):
+            for question in headline_skipped or []:
+                asked, fired, skips = counts.get(question, (0, 0, 0))
+                counts[question] = (asked, fired, skips + 1)
+        if not counts:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO question_stats (folder, question, asked, fired, skipped) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(folder, question) DO UPDATE SET asked = asked + excluded.asked, "
+                "fired = fired + excluded.fired, skipped = skipped + excluded.skipped",
+                [(self.folder, question, asked, fired, skips) for question, (asked, fired, skips) in counts.items()],
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
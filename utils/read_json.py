@@ -1,13 +1,147 @@
 import json
 import pandas as pd
 import os
+from collections import Counter
 
-def parse_json_feed(json_path):
+JSON_FEED_COLUMNS = ["title", "url", "content_html", "date_published", "tags", "id"]
+JSON_FEED_BATCH_SIZE = 5000
+# Characters read from the file at a time while streaming a feed.
+JSON_FEED_CHUNK_CHARS = 1 << 20
+
+_decoder = json.JSONDecoder()
+# Characters that can follow a complete number.
+_NUMBER_DELIMITERS = set(" \t\r\n,]}")
+
+
+class _JsonStream:
+    """
+    Decodes consecutive JSON values from a file without loading it whole. Only
+    the unread tail of the current chunk is kept in memory.
+    """
+
+    def __init__(self, file, chunk_chars=JSON_FEED_CHUNK_CHARS):
+        self.file = file
+        self.chunk_chars = chunk_chars
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self):
+        chunk = self.file.read(self.chunk_chars)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, or "" at end of file.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read_more():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expected '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decodes the next value. A value that ends exactly at the end of the buffer
+        may be cut off, and so may a number that is not followed by a delimiter
+        ("1." or "1e" decodes as 1), so more input is read before accepting either.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                complete = end < len(self.buffer)
+                if complete and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    complete = self.buffer[end] in _NUMBER_DELIMITERS
+                if complete or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+
+def iter_json_feed_items(json_path, chunk_chars=JSON_FEED_CHUNK_CHARS):
+    """
+    Yields the entries of the top-level "items" list of a JSON feed one at a time.
+    Raises json.JSONDecodeError on malformed JSON and ValueError if the file is
+    empty or has no "items" list.
+    """
+    with open(json_path, "r", encoding="utf-8") as file:
+        stream = _JsonStream(file, chunk_chars)
+        if stream.peek() == "":
+            raise ValueError(f"JSON file '{json_path}' is empty.")
+        stream.expect("{")
+        found_items = False
+        first_key = True
+        while stream.peek() != "}":
+            if not first_key:
+                stream.expect(",")
+            first_key = False
+            key = stream.decode()
+            stream.expect(":")
+            if key != "items" or stream.peek() != "[":
+                # Other top-level fields (title, version, ...) are small; decode and discard them.
+                stream.decode()
+                continue
+            stream.expect("[")
+            while stream.peek() != "]":
+                yield stream.decode()
+                if stream.peek() == ",":
+                    stream.expect(",")
+            stream.expect("]")
+            found_items = True
+        if not found_items:
+            raise ValueError(f"Invalid JSON structure in '{json_path}'. Expected a dictionary with a list under 'items'.")
+
+
+def iter_json_feed_batches(json_path, batch_size=JSON_FEED_BATCH_SIZE, chunk_chars=JSON_FEED_CHUNK_CHARS):
+    """
+    Streams a JSON feed file and yields column-oriented batches of up to batch_size
+    articles, as dicts mapping each of JSON_FEED_COLUMNS to a list of values.
+    """
+    batch = {column: [] for column in JSON_FEED_COLUMNS}
+    count = 0
+    for item in iter_json_feed_items(json_path, chunk_chars):
+        if not isinstance(item, dict):
+            print("Warning: Skipping invalid item (not a dictionary).")
+            continue
+        batch["title"].append(item.get("title", "Unknown"))
+        batch["url"].append(item.get("url", "Unknown"))
+        batch["content_html"].append(item.get("content_html", "Unknown"))
+        batch["date_published"].append(item.get("date_published", "Unknown"))
+        batch["tags"].append(", ".join(item.get("tags", [])) if isinstance(item.get("tags"), list) else "Unknown")
+        batch["id"].append(item.get("id", "Unknown"))
+        count += 1
+        if count == batch_size:
+            yield batch
+            batch = {column: [] for column in JSON_FEED_COLUMNS}
+            count = 0
+    if count:
+        yield batch
+
+
+def parse_json_feed(json_path, batch_size=JSON_FEED_BATCH_SIZE, chunk_chars=JSON_FEED_CHUNK_CHARS):
     """
     Parses a JSON feed file and extracts article information into a DataFrame.
+    The file is streamed in batches and the DataFrame is built column by column,
+    so neither the raw text nor the parsed items are ever held in memory whole.
     
     Args:
         json_path (str): Path to the JSON feed file.
+        batch_size (int): Number of articles decoded per batch.
+        chunk_chars (int): Characters read from the file at a time.
     
     Returns:
         pd.DataFrame: DataFrame containing extracted article information (title, url, content_html, date_published, tags, id).
@@ -17,52 +151,38 @@ def parse_json_feed(json_path):
         return pd.DataFrame()
 
     try:
-        with open(json_path, "r", encoding="utf-8") as file:
-            content = file.read().strip()
-            if not content:
-                print(f"Error: JSON file '{json_path}' is empty.")
-                return pd.DataFrame()
-            data = json.loads(content)
-
-        # Ensure "items" is a list
-        if not isinstance(data, dict) or "items" not in data or not isinstance(data["items"], list):
-            print(f"Error: Invalid JSON structure in '{json_path}'. Expected a dictionary with a list under 'items'.")
+        columns = {column: [] for column in JSON_FEED_COLUMNS}
+        for batch in iter_json_feed_batches(json_path, batch_size, chunk_chars):
+            for column in JSON_FEED_COLUMNS:
+                columns[column].extend(batch[column])
+        if not columns["id"]:
             return pd.DataFrame()
-
-        # Extract relevant fields
-        articles = []
-        for item in data["items"]:
-            if not isinstance(item, dict):
-                print("Warning: Skipping invalid item (not a dictionary).")
-                continue
-
-            article_info = {
-                "title": item.get("title", "Unknown"),
-                "url": item.get("url", "Unknown"),
-                "content_html": item.get("content_html", "Unknown"),
-                "date_published": item.get("date_published", "Unknown"),
-                "tags": ", ".join(item.get("tags", [])) if isinstance(item.get("tags"), list) else "Unknown",
-                "id": item.get("id", "Unknown")
-            }
-            articles.append(article_info)
-
-        return pd.DataFrame(articles)
+        return pd.DataFrame(columns, columns=JSON_FEED_COLUMNS)
 
     except json.JSONDecodeError:
         print(f"Error: Failed to decode JSON file '{json_path}'. Ensure it's properly formatted.")
+    except ValueError as e:
+        print(f"Error: {e}")
     except Exception as e:
         print(f"Unexpected error while parsing JSON: {e}")
 
     return pd.DataFrame()
 
-def parse_inoreader_feed(json_data):
+INOREADER_FEED_COLUMNS = ["title", "url", "content_html", "date_published", "tags", "id", "crawl_time"]
+
+
+def parse_inoreader_feed(json_data, diagnostics=False):
     """
     Parses an Inoreader JSON feed (provided directly as a Python object or JSON string)
     and extracts article information into a DataFrame with the following columns:
-    title, url, content_html, date_published, tags, id.
+    title, url, content_html, date_published, tags, id, crawl_time.
+
+    Values are collected column by column and tags is stored as a categorical,
+    since the same few folder/label combinations repeat across a feed.
     
     Args:
         json_data (list or str): The JSON data as a list of article dictionaries or a JSON string.
+        diagnostics (bool): If True, print one summary of where URLs came from and what was skipped.
     
     Returns:
         pd.DataFrame: DataFrame containing the extracted article information.
@@ -80,44 +200,55 @@ def parse_inoreader_feed(json_data):
         print("Error: Invalid JSON structure. Expected a list of articles.")
         return pd.DataFrame()
 
-    articles = []
+    titles, urls, contents, published, tags, ids, crawl_times = [], [], [], [], [], [], []
+    counts = Counter()
     for item in json_data:
         if not isinstance(item, dict):
-            print("Warning: Skipping invalid item (not a dictionary).")
+            counts["skipped"] += 1
             continue
 
-        # Extract fields with fallbacks for missing values.
-        title = item.get("title", "Unknown")
-        print("inside")
+        titles.append(item.get("title", "Unknown"))
+
         # Prefer the first canonical URL; fall back to alternate if not present.
-        url = "Unknown"
-        if "canonical" in item and isinstance(item["canonical"], list) and item["canonical"]:
-            url = item["canonical"][0].get("href", "Unknown")
-            print("canon", url)
-        elif "alternate" in item and isinstance(item["alternate"], list) and item["alternate"]:
-            url = item["alternate"][0].get("href", "Unknown")
+        canonical = item.get("canonical")
+        alternate = item.get("alternate")
+        if isinstance(canonical, list) and canonical:
+            urls.append(canonical[0].get("href", "Unknown"))
+            counts["canonical"] += 1
+        elif isinstance(alternate, list) and alternate:
+            urls.append(alternate[0].get("href", "Unknown"))
+            counts["alternate"] += 1
+        else:
+            urls.append("Unknown")
+            counts["no_url"] += 1
 
         # Extract content HTML from the summary.
-        content_html = "Unknown"
-        if "summary" in item and isinstance(item["summary"], dict):
-            content_html = item["summary"].get("content", "Unknown")
+        summary = item.get("summary")
+        contents.append(summary.get("content", "Unknown") if isinstance(summary, dict) else "Unknown")
 
         # Use the 'published' field as the publication date.
-        date_published = item.get("published", "Unknown")
-        
+        published.append(item.get("published", "Unknown"))
+
         # Combine categories (tags) into a comma-separated string.
-        tags = "Unknown"
-        if "categories" in item and isinstance(item["categories"], list):
-            tags = ", ".join(item["categories"])
-
-        article_info = {
-            "title": title,
-            "url": url,
-            "content_html": content_html,
-            "date_published": date_published,
-            "tags": tags,
-            "id": item.get("id", "Unknown")
-        }
-        articles.append(article_info)
-
-    return pd.DataFrame(articles)
+        categories = item.get("categories")
+        tags.append(", ".join(categories) if isinstance(categories, list) else "Unknown")
+
+        ids.append(item.get("id", "Unknown"))
+        # Crawl time in Unix seconds, used as the incremental sync watermark.
+        crawl_time = item.get("crawlTimeMsec")
+        crawl_times.append(int(crawl_time) / 1000.0 if crawl_time else item.get("published"))
+
+    if diagnostics:
+        print(f"Parsed {len(ids)} Inoreader items: {dict(counts)}")
+    if not ids:
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        "title": titles,
+        "url": urls,
+        "content_html": contents,
+        "date_published": published,
+        "tags": pd.Categorical(tags),
+        "id": ids,
+        "crawl_time": pd.to_numeric(pd.Series(crawl_times, dtype="object"), errors="coerce"),
+    }, columns=INOREADER_FEED_COLUMNS)
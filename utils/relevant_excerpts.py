@@ -1,29 +1,26 @@
 """
-Not using this module as of right now
+Embedding helpers for picking the parts of a long text that matter for each variable.
+build_detail_context uses them to trim long articles before project detail extraction.
 """
-import json
 import numpy as np
-import os
+import re
 import tiktoken
+from utils.embedding_cache import EmbeddingCache, DEFAULT_EMBEDDING_CACHE_DIR
+from services.openai_limiter import create_embeddings
 
-
-def get_cache_fname(pdf_path, path_fxn):
-    pdf_fname = os.path.basename(pdf_path)
-    cache_dir = path_fxn("embeddings_cache")
-    if not os.path.exists(cache_dir):
-        os.makedirs(cache_dir)
-    return f"{cache_dir}/{pdf_fname.replace('.pdf','.json')}"
-
-
-def cache_embeddings(embeddings, text_chunks, pdf_file_path, path_fxn):
-    json_file_path = get_cache_fname(pdf_file_path, path_fxn)
-    output_dict = {"embeddings": embeddings, "text_chunks": text_chunks}
-    with open(json_file_path, "w", encoding="utf-8") as f:
-        json.dump(output_dict, f)
+EMBEDDINGS_MODEL = "text-embedding-3-small"
+EMBEDDINGS_TOKEN_LIMIT = 8000
+# Articles longer than this many tokens are reduced to their most relevant excerpts.
+DETAIL_CONTEXT_TOKEN_THRESHOLD = 3000
+DETAIL_CHUNK_TOKENS = 200
+DETAIL_EXCERPTS_PER_FIELD = 3
+# Most tokens of excerpts build_detail_context keeps; never more than a short article sent whole.
+DETAIL_CONTEXT_TOKEN_BUDGET = DETAIL_CONTEXT_TOKEN_THRESHOLD
+EXCERPT_SEPARATOR = "\n...\n"
 
 
 def generate_embeddings(openai_client, text, model="text-embedding-3-small"):
-    response = openai_client.embeddings.create(model=model, input=text)
+    response = create_embeddings(openai_client, model=model, input=text)
     return response
 
 
@@ -32,60 +29,106 @@ def generate_embedding(openai_client, text):
     return r.data[0].embedding
 
 
-def generate_all_embeddings(openai_client, pdf_path, text_chunks, path_fxn):
-    embeddings_model, token_limit = "text-embedding-3-small", 8000
-    cache_fname = get_cache_fname(pdf_path, path_fxn)
-    if os.path.exists(cache_fname):
-        with open(cache_fname, "r", encoding="utf-8") as f:
-            cached_embeddings = json.load(f)
-            return cached_embeddings["embeddings"], cached_embeddings["text_chunks"]
-    else:
-        batches = []
-        current_batch = []
-        current_tokens = 0
-        enc = tiktoken.encoding_for_model(embeddings_model)
-        for text in text_chunks:
-            tokens = len(enc.encode(text))
-            if current_tokens + tokens > token_limit:
-                batches.append(current_batch)
-                current_batch = [text]
-                current_tokens = tokens
-            else:
-                current_batch.append(text)
-                current_tokens += tokens
-        if len(current_batch) > 0:
+def batch_texts_by_tokens(texts, token_limit=EMBEDDINGS_TOKEN_LIMIT, embeddings_model=EMBEDDINGS_MODEL):
+    """
+    Splits texts into consecutive batches whose total token count stays under token_limit.
+    """
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    enc = tiktoken.encoding_for_model(embeddings_model)
+    for text in texts:
+        tokens = len(enc.encode(text))
+        if current_batch and current_tokens + tokens > token_limit:
             batches.append(current_batch)
+            current_batch = [text]
+            current_tokens = tokens
+        else:
+            current_batch.append(text)
+            current_tokens += tokens
+    if len(current_batch) > 0:
+        batches.append(current_batch)
+    return batches
+
 
+def embed_texts(openai_client, texts, embeddings_model=EMBEDDINGS_MODEL, token_limit=EMBEDDINGS_TOKEN_LIMIT, embedding_cache=None):
+    """
+    Embeds texts with one embeddings request per token-limited batch.
+    With an embedding_cache, texts embedded before are read from it and only
+    new, distinct texts are sent to the API.
+    Returns the embeddings in input order.
+    """
+    if embedding_cache is None:
         embeddings = []
-        for batch in batches:
+        for batch in batch_texts_by_tokens(texts, token_limit, embeddings_model):
             response = generate_embeddings(openai_client, batch, embeddings_model)
             embeddings.extend([r.embedding for r in response.data])
+        return embeddings
+    embeddings = embedding_cache.get_many(texts, embeddings_model)
+    missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+    if missing:
+        new_embeddings = embed_texts(openai_client, missing, embeddings_model, token_limit)
+        embedding_cache.put_many(missing, new_embeddings, embeddings_model)
+        by_text = dict(zip(missing, new_embeddings))
+        embeddings = [
+            embedding if embedding is not None else np.asarray(by_text[text], dtype=np.float32)
+            for text, embedding in zip(texts, embeddings)
+        ]
+    return embeddings
+
 
-        cache_embeddings(embeddings, text_chunks, pdf_path, path_fxn)
-        return embeddings, text_chunks
+def generate_all_embeddings(openai_client, pdf_path, text_chunks, path_fxn):
+    """
+    Embeds text_chunks, reusing any chunk already in the embedding cache under
+    path_fxn(DEFAULT_EMBEDDING_CACHE_DIR). Chunks are cached by content, so
+    pdf_path is no longer part of the key.
+    """
+    embedding_cache = EmbeddingCache(path_fxn(DEFAULT_EMBEDDING_CACHE_DIR))
+    try:
+        embeddings = embed_texts(openai_client, text_chunks, embedding_cache=embedding_cache)
+    finally:
+        embedding_cache.close()
+    return embeddings, text_chunks
 
 
 def embed_one_variable_specification(openai_client, prompt):
     return generate_embedding(openai_client, prompt)
 
 
-def embed_variable_specifications(openai_client, variables):
+def variable_specification_prompt(var, spec):
+    """
+    Builds the text embedded for one variable and the spec dict stored alongside it.
+    """
+    prompt = var
+    spec_dict = {"variable_description": "", "context": ""}
+    if "variable_description" in spec:
+        var_desc = spec["variable_description"]
+        if len(var_desc) > 1:
+            prompt = f"{var}: '{var_desc}'"
+            spec_dict["variable_description"] = var_desc
+    if "context" in spec:
+        context = spec["context"]
+        if len(context) > 1:
+            prompt += f". Context: {context}"
+            spec_dict["context"] = context
+    return prompt, spec_dict
+
+
+def embed_variable_specifications(openai_client, variables, embedding_cache=None):
+    """
+    Embeds every variable specification with token-limited batch requests.
+    With an embedding_cache, prompts are memoized by their text, so unchanged
+    specifications are never embedded again.
+    """
     var_embeddings = {}
+    prompts = []
     for var in variables:
-        prompt = var
-        spec_dict = {"variable_description": "", "context": ""}
-        if "variable_description" in variables[var]:
-            var_desc = variables[var]["variable_description"]
-            if len(var_desc) > 1:
-                prompt = f"{var}: '{var_desc}'"
-                spec_dict["variable_description"] = var_desc
-        if "context" in variables[var]:
-            context = variables[var]["context"]
-            if len(context) > 1:
-                prompt += f". Context: {context}"
-                spec_dict["context"] = context
-        spec_dict["embedding"] = embed_one_variable_specification(openai_client, prompt)
+        prompt, spec_dict = variable_specification_prompt(var, variables[var])
         var_embeddings[var] = spec_dict
+        prompts.append(prompt)
+    embeddings = embed_texts(openai_client, prompts, embedding_cache=embedding_cache)
+    for var, embedding in zip(var_embeddings, embeddings):
+        var_embeddings[var]["embedding"] = embedding
     return var_embeddings
 
 
@@ -93,26 +136,180 @@ def cosine_similarity(a, b):
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
 
+class EmbeddingStore:
+    """
+    Holds chunk embeddings as one L2-normalized float32 matrix so cosine
+    similarity against any number of queries is a single matrix product.
+    """
+
+    def __init__(self, text_embeddings, text_chunks):
+        self.text_chunks = list(text_chunks)
+        if not self.text_chunks:
+            # An article that produced no chunks matches nothing.
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+            return
+        matrix = np.asarray(text_embeddings, dtype=np.float32).reshape(len(self.text_chunks), -1)
+        self.matrix = normalize_rows(matrix)
+
+    def __len__(self):
+        return len(self.text_chunks)
+
+    def similarities(self, query_embeddings):
+        """
+        Returns an (n_queries, n_chunks) array of cosine similarities.
+        """
+        queries = normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        if len(self) == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+        return queries @ self.matrix.T
+
+    def top_k(self, query_embeddings, k):
+        """
+        Returns, for each query, the indices of its k most similar chunks in descending order of similarity.
+        """
+        scores = self.similarities(query_embeddings)
+        k = min(k, len(self))
+        if k <= 0:
+            return [np.array([], dtype=np.int64) for _ in range(scores.shape[0])]
+        if k < len(self):
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(len(self)), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        return list(np.take_along_axis(candidates, order, axis=1))
+
+    def find_top_relevant(self, var_embeddings, num_excerpts, name_priority=True):
+        """
+        Scores every variable in one matrix product.
+        With name_priority, chunks containing the variable name come first,
+        followed by the top num_excerpts chunks by similarity that are not
+        already included. Turn it off for generic names ("company", "scale")
+        that appear in nearly every chunk.
+
+        Args:
+            var_embeddings (dict): Variable name -> embedding.
+
+        Returns:
+            dict: Variable name -> list of chunk indices.
+        """
+        var_names = list(var_embeddings)
+        if not var_names:
+            return {}
+        top_indices = self.top_k([var_embeddings[var_name] for var_name in var_names], num_excerpts)
+        results = {}
+        for var_name, indices in zip(var_names, top_indices):
+            if not name_priority:
+                results[var_name] = [int(i) for i in indices]
+                continue
+            priority = [i for i, chunk in enumerate(self.text_chunks) if var_name in chunk]
+            priority_set = set(priority)
+            results[var_name] = priority + [int(i) for i in indices if i not in priority_set]
+        return results
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
 def find_top_relevant_texts(
     text_embeddings, pdf_text_chunks, var_embedding, num_excerpts, var_name
 ):
-    relevant_texts = []
-    indeces = set()
-    similarity_scores = []
-    for i in range(len(text_embeddings)):
-        if var_name in pdf_text_chunks[i]:
-            indeces.add(i)
-            relevant_texts.append((text_embeddings[i], pdf_text_chunks[i]))
-        text_embedding = text_embeddings[i]
-        similarity = cosine_similarity(var_embedding, text_embedding)
-        similarity_scores.append((i, similarity))
-    # Sort by similarity score in descending order and take the top_n items
-    sorted_embeddings = sorted(similarity_scores, key=lambda x: x[1], reverse=True)[
-        :num_excerpts
-    ]
+    """
+    Returns [(text_embedding, text_chunk), ...] for the chunks most relevant to one variable.
+    text_embeddings may be a list of embeddings or a prebuilt EmbeddingStore.
+    """
+    if isinstance(text_embeddings, EmbeddingStore):
+        store = text_embeddings
+        embeddings = store.matrix
+    else:
+        store = EmbeddingStore(text_embeddings, pdf_text_chunks)
+        embeddings = text_embeddings
+    indices = store.find_top_relevant({var_name: var_embedding}, num_excerpts)[var_name]
     ## RETURNS [(textembed, text), ..., 10x] for each variable
-    return relevant_texts + [
-        (text_embeddings[i], pdf_text_chunks[i])
-        for i, _ in sorted_embeddings
-        if i not in indeces
-    ]
+    return [(embeddings[i], pdf_text_chunks[i]) for i in indices]
+
+
+def chunk_text_by_tokens(text, max_tokens=DETAIL_CHUNK_TOKENS, embeddings_model=EMBEDDINGS_MODEL):
+    """
+    Splits text into chunks of at most max_tokens tokens, keeping paragraphs
+    together where possible and cutting oversized paragraphs on token boundaries.
+    """
+    enc = tiktoken.encoding_for_model(embeddings_model)
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    for paragraph in re.split(r"\n\s*\n|\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = enc.encode(paragraph)
+        if len(tokens) > max_tokens:
+            if current_chunk:
+                chunks.append("\n".join(current_chunk))
+                current_chunk, current_tokens = [], 0
+            for start in range(0, len(tokens), max_tokens):
+                chunks.append(enc.decode(tokens[start:start + max_tokens]))
+            continue
+        if current_chunk and current_tokens + len(tokens) > max_tokens:
+            chunks.append("\n".join(current_chunk))
+            current_chunk, current_tokens = [], 0
+        current_chunk.append(paragraph)
+        current_tokens += len(tokens)
+    if current_chunk:
+        chunks.append("\n".join(current_chunk))
+    return chunks
+
+
+def build_detail_context(
+    openai_client,
+    article_text,
+    field_specs,
+    token_threshold=DETAIL_CONTEXT_TOKEN_THRESHOLD,
+    chunk_tokens=DETAIL_CHUNK_TOKENS,
+    num_excerpts=DETAIL_EXCERPTS_PER_FIELD,
+    embedding_cache=None,
+    token_budget=DETAIL_CONTEXT_TOKEN_BUDGET,
+):
+    """
+    Returns the text to send for project detail extraction.
+    Articles up to token_threshold tokens are returned whole. Longer ones are
+    chunked, the chunks and field specs are embedded in batched requests, and
+    the top num_excerpts chunks per field are kept, in article order, up to
+    token_budget tokens. Fields take turns: every field's best chunk is added
+    before any field's second best.
+    Chunks and field specs found in embedding_cache are not embedded again.
+
+    Args:
+        field_specs (dict): Field name -> {"variable_description", "context"}, as in DETAIL_FIELD_SPECS.
+    """
+    enc = tiktoken.encoding_for_model(EMBEDDINGS_MODEL)
+    if not article_text or len(enc.encode(article_text)) <= token_threshold:
+        return article_text
+    chunks = chunk_text_by_tokens(article_text, chunk_tokens)
+    prompts = [variable_specification_prompt(field, spec)[0] for field, spec in field_specs.items()]
+    try:
+        embeddings = embed_texts(openai_client, chunks + prompts, embedding_cache=embedding_cache)
+    except Exception as e:
+        print(f"Error embedding article excerpts, sending full text: {e}")
+        return article_text
+    store = EmbeddingStore(embeddings[:len(chunks)], chunks)
+    field_embeddings = dict(zip(field_specs, embeddings[len(chunks):]))
+    # Field keys such as "company" or "technology" occur in almost every chunk, so rank by similarity only.
+    ranked = list(store.find_top_relevant(field_embeddings, num_excerpts, name_priority=False).values())
+    separator_tokens = len(enc.encode(EXCERPT_SEPARATOR))
+    selected = set()
+    used_tokens = 0
+    for rank in range(num_excerpts):
+        for indices in ranked:
+            if rank >= len(indices) or indices[rank] in selected:
+                continue
+            chunk_tokens_used = len(enc.encode(chunks[indices[rank]])) + separator_tokens
+            if used_tokens + chunk_tokens_used > token_budget:
+                continue
+            selected.add(indices[rank])
+            used_tokens += chunk_tokens_used
+    print(f"Reduced article from {len(chunks)} to {len(selected)} excerpts ({used_tokens} tokens) for detail extraction")
+    return EXCERPT_SEPARATOR.join(chunks[i] for i in sorted(selected))
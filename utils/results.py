@@ -54,7 +54,11 @@ def output_metrics(doc, num_docs, t, num_pages, failed_pdfs):
     )
     if len(failed_pdfs) > 0:
         doc.add_heading(f"Unable to process the following PDFs: {failed_pdfs}", 4)
-def output_results_excel(relevant_articles, irrelevant_articles, output_path):
+# st.secrets keys of the OneDrive upload target.
+ONEDRIVE_SECRET_KEYS = ["od_tenantid", "od_client_id", "od_client_value", "od_drive_id", "od_parent_item"]
+
+
+def output_results_excel(relevant_articles, irrelevant_articles, output_path, onedrive_secrets=None):
     """
     Writes the results into an Excel file with four worksheets:
       - 'Relevant Stage 1': Articles flagged as relevant by the headline but with insufficient extracted core details.
@@ -64,7 +68,11 @@ def output_results_excel(relevant_articles, irrelevant_articles, output_path):
             Company, Potential Partners, Continent, Country, Project status, and a "Check Results" column.)
       - 'Irrelevant': Articles deemed irrelevant.
       - 'All Articles': A combined list of all articles (from irrelevant, Stage 1, and Stage 2) showing
-           the article titles, URLs, and if they were discarded before stage 1 or stage 2.
+           the article titles, URLs, and if they were discarded before stage 1 or stage 2, plus the
+           near-duplicate cluster each headline was screened with.
+    The workbook is uploaded to OneDrive; pass onedrive_secrets (ONEDRIVE_SECRET_KEYS -> value)
+    when calling outside a Streamlit script run, where st.secrets is not available.
+    Returns the OneDrive response, or None if the upload failed.
     """
 
     # Define simple columns for Stage 1 and Irrelevant sheets.
@@ -192,28 +200,35 @@ def output_results_excel(relevant_articles, irrelevant_articles, output_path):
         all_articles.append({
             "title": article.get("title", ""),
             "url": article.get("url", ""),
-            "Discarded": "Discarded before Stage 2"
+            "Discarded": "Discarded before Stage 2",
+            "Cluster": article.get("cluster_id", ""),
+            "Duplicate of": article.get("duplicate_of", "")
         })
     # For Stage 2 articles, leave the "Discarded" column blank.
     for article in stage2_articles:
         all_articles.append({
             "title": article.get("title", ""),
             "url": article.get("url", ""),
-            "Discarded": ""
+            "Discarded": "",
+            "Cluster": article.get("cluster_id", ""),
+            "Duplicate of": article.get("duplicate_of", "")
         })
     # For irrelevant articles, mark as "Discarded before Stage 1".
     for article in irrelevant_articles:
         all_articles.append({
             "title": article.get("title", ""),
             "url": article.get("url", ""),
-            "Discarded": "Discarded before Stage 1"
+            "Discarded": "Discarded before Stage 1",
+            "Cluster": article.get("cluster_id", ""),
+            "Duplicate of": article.get("duplicate_of", "")
         })
-    df_all = pd.DataFrame(all_articles, columns=["title", "url", "Discarded"])
-    tenant_id = st.secrets["od_tenantid"]
-    client_id = st.secrets["od_client_id"]
-    client_secret = st.secrets["od_client_value"]
-    drive_id = st.secrets["od_drive_id"]
-    parent_item_id = st.secrets["od_parent_item"]
+    df_all = pd.DataFrame(all_articles, columns=["title", "url", "Discarded", "Cluster", "Duplicate of"])
+    secrets = onedrive_secrets or st.secrets
+    tenant_id = secrets["od_tenantid"]
+    client_id = secrets["od_client_id"]
+    client_secret = secrets["od_client_value"]
+    drive_id = secrets["od_drive_id"]
+    parent_item_id = secrets["od_parent_item"]
     buffer = io.BytesIO()
     # Write all DataFrames to an Excel file with four sheets.
     with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
@@ -227,5 +242,6 @@ def output_results_excel(relevant_articles, irrelevant_articles, output_path):
     if not graph_access_token:
         print("Could not obtain Graph API token.")
         return
-    upload_file_to_onedrive(file_bytes, drive_id, parent_item_id, output_path, graph_access_token)
+    uploaded = upload_file_to_onedrive(file_bytes, drive_id, parent_item_id, output_path, graph_access_token)
     print(f"Excel saved to: {output_path}")
+    return uploaded
@@ -0,0 +1,131 @@
+"""
+A small key/value cache stored in a SQLite file, shared by the on-disk caches
+in this package. Values are stored as JSON. Entries can carry their own TTL,
+and the whole cache can be trimmed by age and by number of entries.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """
+    JSON key/value store in a single SQLite table with hit/miss counters.
+    Safe to share between threads; each operation holds a lock.
+    """
+
+    def __init__(self, db_path, max_age_seconds=None, max_entries=None):
+        """
+        Opens (or creates) the cache at db_path and evicts stale entries.
+
+        Args:
+            db_path (str): Path to the SQLite file.
+            max_age_seconds (float): Entries older than this are dropped. None keeps them forever.
+            max_entries (int): Keep at most this many entries, dropping the least recently used. None means unbounded.
+        """
+        cache_dir = os.path.dirname(db_path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+            "last_used REAL NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._is_stale(row[1], row[2], now):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def peek(self, key):
+        """
+        Like get, but leaves the hit/miss counters and the entry's last use untouched.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or self._is_stale(row[1], row[2], time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl_seconds=None):
+        """
+        Stores value under key. ttl_seconds overrides max_age_seconds for this entry.
+        """
+        now = time.time()
+        expires_at = now + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, last_used, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value), now, now, expires_at),
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def evict(self):
+        """
+        Drops expired entries, then the least recently used ones beyond max_entries.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+            if self.max_age_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE expires_at IS NULL AND created_at < ?",
+                    (now - self.max_age_seconds,),
+                )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (int(self.max_entries),),
+                )
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current number of entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _is_stale(self, created_at, expires_at, now):
+        if expires_at is not None:
+            return expires_at < now
+        return self.max_age_seconds is not None and created_at < now - self.max_age_seconds
@@ -0,0 +1,96 @@
+"""
+Per-folder Inoreader sync state for incremental runs: the newest item
+timestamp seen (the watermark) and the IDs of items that already have a
+final verdict, so a run only fetches and screens what is new.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_SYNC_STATE_PATH = os.path.join("cache", "inoreader_sync.sqlite")
+# Processed IDs older than this are forgotten; Inoreader never returns them again.
+DEFAULT_SEEN_RETENTION_DAYS = 30
+# "incremental": fetch items newer than the watermark and skip processed IDs.
+# "full": fetch the whole 7-day window and screen every item again.
+SYNC_MODES = ["incremental", "full"]
+DEFAULT_SYNC_MODE = "incremental"
+
+
+class SyncState:
+    """
+    Stores a watermark (Unix seconds) per folder and the processed item IDs with their verdicts.
+    """
+
+    def __init__(self, db_path=DEFAULT_SYNC_STATE_PATH, retention_days=DEFAULT_SEEN_RETENTION_DAYS):
+        state_dir = os.path.dirname(db_path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+        self.retention_seconds = retention_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks (folder TEXT PRIMARY KEY, watermark REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_items ("
+            "folder TEXT NOT NULL, item_id TEXT NOT NULL, verdict TEXT NOT NULL, processed_at REAL NOT NULL, "
+            "PRIMARY KEY (folder, item_id))"
+        )
+        self._conn.commit()
+        self.prune()
+
+    def get_watermark(self, folder):
+        """
+        Returns the newest item timestamp (Unix seconds) recorded for folder, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT watermark FROM watermarks WHERE folder = ?", (folder,)).fetchone()
+        return row[0] if row else None
+
+    def processed_ids(self, folder):
+        with self._lock:
+            rows = self._conn.execute("SELECT item_id FROM seen_items WHERE folder = ?", (folder,)).fetchall()
+        return {row[0] for row in rows}
+
+    def record_run(self, folder, verdicts, watermark=None):
+        """
+        Records final verdicts ({item_id: verdict}) and moves the watermark forward.
+        Call only after a run has finished, so a failed run is retried in full.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO seen_items (folder, item_id, verdict, processed_at) VALUES (?, ?, ?, ?)",
+                [(folder, str(item_id), verdict, now) for item_id, verdict in verdicts.items()],
+            )
+            if watermark is not None and not math.isnan(float(watermark)):
+                self._conn.execute(
+                    "INSERT INTO watermarks (folder, watermark, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(folder) DO UPDATE SET watermark = MAX(watermark, excluded.watermark), "
+                    "updated_at = excluded.updated_at",
+                    (folder, float(watermark), now),
+                )
+            self._conn.commit()
+
+    def reset(self, folder):
+        """
+        Forgets the watermark and processed IDs of folder.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM watermarks WHERE folder = ?", (folder,))
+            self._conn.execute("DELETE FROM seen_items WHERE folder = ?", (folder,))
+            self._conn.commit()
+
+    def prune(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM seen_items WHERE processed_at < ?", (time.time() - self.retention_seconds,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,44 @@
+"""
+On-disk cache mapping Inoreader/Google News source URLs to the article URL they resolve to.
+Failed resolutions are cached too, with a much shorter TTL, so dead links do not
+stall every rerun.
+"""
+
+import os
+from utils.sqlite_cache import SQLiteCache
+
+DEFAULT_URL_CACHE_PATH = os.path.join("cache", "resolved_urls.sqlite")
+DEFAULT_URL_TTL_DAYS = 30
+DEFAULT_NEGATIVE_TTL_HOURS = 6
+DEFAULT_URL_MAX_ENTRIES = 200000
+
+
+class UrlCache(SQLiteCache):
+    """
+    Maps a source URL to its resolved URL. A cached None means resolution failed recently.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_URL_CACHE_PATH,
+        ttl_days=DEFAULT_URL_TTL_DAYS,
+        negative_ttl_hours=DEFAULT_NEGATIVE_TTL_HOURS,
+        max_entries=DEFAULT_URL_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.negative_ttl_seconds = negative_ttl_hours * 60 * 60
+        super().__init__(db_path, max_age_seconds=self.ttl_seconds, max_entries=max_entries)
+
+    def lookup(self, source_url):
+        """
+        Returns (found, resolved_url). found is False on a miss; resolved_url
+        is None when a recent resolution attempt failed.
+        """
+        entry = self.get(source_url)
+        if entry is None:
+            return False, None
+        return True, entry["resolved_url"]
+
+    def store(self, source_url, resolved_url):
+        ttl_seconds = self.ttl_seconds if resolved_url else self.negative_ttl_seconds
+        self.set(source_url, {"resolved_url": resolved_url}, ttl_seconds=ttl_seconds)
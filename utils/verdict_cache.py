@@ -0,0 +1,50 @@
+"""
+On-disk cache of GPT screening verdicts. Inoreader returns a rolling 7-day
+window, so most headlines are screened again on every run; this cache lets
+reruns reuse earlier answers instead of calling the API.
+"""
+
+import hashlib
+import os
+import re
+from utils.sqlite_cache import SQLiteCache
+
+DEFAULT_VERDICT_CACHE_PATH = os.path.join("cache", "verdicts.sqlite")
+DEFAULT_VERDICT_MAX_AGE_DAYS = 60
+DEFAULT_VERDICT_MAX_ENTRIES = 500000
+
+
+def normalize_headline(text):
+    """
+    Lowercases and collapses whitespace so trivial formatting differences share a cache entry.
+    """
+    return re.sub(r"\s+", " ", str(text or "")).strip().lower()
+
+
+class VerdictCache(SQLiteCache):
+    """
+    Maps (headline, question, model, prompt version) to a "yes"/"no" answer.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_VERDICT_CACHE_PATH,
+        max_age_days=DEFAULT_VERDICT_MAX_AGE_DAYS,
+        max_entries=DEFAULT_VERDICT_MAX_ENTRIES,
+    ):
+        max_age_seconds = max_age_days * 24 * 60 * 60 if max_age_days is not None else None
+        super().__init__(db_path, max_age_seconds=max_age_seconds, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(headline, question, model, prompt_version):
+        raw = "\x1f".join([normalize_headline(headline), question.strip(), model, prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_verdict(self, headline, question, model, prompt_version):
+        return self.get(self.make_key(headline, question, model, prompt_version))
+
+    def peek_verdict(self, headline, question, model, prompt_version):
+        return self.peek(self.make_key(headline, question, model, prompt_version))
+
+    def set_verdict(self, headline, question, model, prompt_version, verdict):
+        self.set(self.make_key(headline, question, model, prompt_version), verdict)